@@ -23,6 +23,9 @@ target_metadata = BaseSQLModel.metadata
 
 
 def load_models():
+    # Shared tables
+    importlib.import_module('share.kafka.outbox')
+
     root_dir = settings.ROOT_DIR
     app_dir = os.path.join(root_dir, 'app')
 
@@ -1,7 +1,9 @@
 from dddesign.structure.domains.constants import BaseEnum
 
+from config.databases.postgres import Atomic
 from config.settings import settings
 
+from share.kafka.outbox import BaseKafkaOutboxRepository
 from share.kafka.producer import BaseKafkaProducerRepository
 from share.kafka.settings import ProducerConfig
 
@@ -18,3 +20,11 @@ class KafkaProducerRepository(BaseKafkaProducerRepository):
 
 
 kafka_producer_repository_impl = KafkaProducerRepository()
+
+
+class KafkaOutboxRepository(BaseKafkaOutboxRepository):
+    atomic_class = Atomic
+    producer_repository = kafka_producer_repository_impl
+
+
+kafka_outbox_repository_impl = KafkaOutboxRepository()
@@ -7,12 +7,13 @@ from dramatiq.middleware.prometheus import Prometheus
 from dramatiq.results import Results
 from dramatiq.results.backends.redis import RedisBackend
 
+from config.databases.kafka import kafka_producer_repository_impl
 from config.logging.config import LOG_CONFIG
 from config.logging.sentry import configure_sentry
 from config.settings import settings
 
 from share.dramatiq.facade import BaseDramatiqFacade
-from share.dramatiq.middlewares import TaskLoggingMiddleware
+from share.dramatiq.middlewares import AsyncResourcesMiddleware, TaskLoggingMiddleware
 
 if not settings.DEBUG:
     dictConfig(LOG_CONFIG)
@@ -29,6 +30,8 @@ broker = RedisBroker(
     dead_message_ttl=24 * 60 * 60 * 1000,  # 24 hours in ms
     middleware=[
         AsyncIO(),
+        # After AsyncIO, so producers are stopped after actors finished and before its event loop is stopped
+        AsyncResourcesMiddleware([kafka_producer_repository_impl]),
         AgeLimit(),
         TimeLimit(),
         Callbacks(),
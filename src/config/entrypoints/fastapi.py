@@ -1,9 +1,13 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 
 from dddesign.structure.domains.errors import BaseError, CollectionError
 
+from config.databases.kafka import kafka_producer_repository_impl
 from config.entrypoints.dramatiq import dramatiq_facade_impl
 from config.logging.sentry import configure_sentry
 from config.settings import settings
@@ -16,8 +20,23 @@ from share.fastapi.exception_handlers import (
     handle_request_validation_error,
 )
 from share.fastapi.middlewares import DBConnectionsCloserMiddleware
+from share.prometheus.server import start_metrics_server
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:  # noqa: ARG001
+    metrics_server = start_metrics_server(settings.METRICS_PORT)
+    await kafka_producer_repository_impl.start()
+    try:
+        yield
+    finally:
+        await kafka_producer_repository_impl.stop()
+        if metrics_server:
+            metrics_server.shutdown()
+            metrics_server.server_close()
+
 
-app = FastAPI(title=settings.PROJECT_NAME, debug=settings.DEBUG, servers=[{'url': settings.SERVER_URL}])
+app = FastAPI(title=settings.PROJECT_NAME, debug=settings.DEBUG, servers=[{'url': settings.SERVER_URL}], lifespan=lifespan)
 app.include_router(router)
 
 app.exception_handler(BaseError)(handle_base_error)
@@ -46,6 +46,8 @@ class Settings(BaseSettings):
 
     SENTRY_DSN: HttpUrl | None = None
 
+    METRICS_PORT: int = 9090
+
     @field_validator('KAFKA_BOOTSTRAP_SERVERS', mode='before')
     @classmethod
     def parse_kafka_bootstrap_servers(cls, v: str | list) -> list:
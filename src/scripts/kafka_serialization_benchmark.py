@@ -0,0 +1,111 @@
+"""
+Micro-benchmark of Kafka value formats and compression codecs.
+
+Reports CPU time per event for encoding and decoding, and bytes per event before and after batch compression.
+Codecs missing from the environment are skipped.
+
+Usage:
+    cd src && python -m scripts.kafka_serialization_benchmark --events 100000
+"""
+
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from uuid import UUID, uuid4
+
+import typer
+from aiokafka import codec
+from pydantic import BaseModel
+
+from share.kafka.serialization import VALUE_SERIALIZERS, decode_batch
+
+# Producer batches are compressed as a whole, `ProducerConfig.max_batch_size` bytes at most
+BATCH_BYTES = 32_000
+
+CODECS: dict[str, tuple[Callable[[], bool], Callable[[bytes], bytes]]] = {
+    'gzip': (codec.has_gzip, codec.gzip_encode),
+    'snappy': (codec.has_snappy, codec.snappy_encode),
+    'lz4': (codec.has_lz4, codec.lz4_encode),
+    'zstd': (codec.has_zstd, codec.zstd_encode),
+}
+
+cli = typer.Typer()
+
+
+class BenchmarkEvent(BaseModel):
+    event_id: UUID
+    profile_id: int
+    event_type: str
+    created_at: datetime
+    amount: float
+    tags: list[str]
+
+    @property
+    def idempotent_key(self) -> str:
+        return str(self.event_id)
+
+
+def _build_events(count: int) -> list[BenchmarkEvent]:
+    now = datetime.now(tz=UTC)
+    return [
+        BenchmarkEvent(
+            event_id=uuid4(),
+            profile_id=index,
+            event_type=('open_app', 'purchase', 'logout')[index % 3],
+            created_at=now,
+            amount=index * 0.01,
+            tags=['mobile', f'campaign_{index % 10}'],
+        )
+        for index in range(count)
+    ]
+
+
+def _split_batches(payloads: list[bytes]) -> list[bytes]:
+    batches, batch, batch_bytes = [], [], 0
+    for payload in payloads:
+        if batch and batch_bytes + len(payload) > BATCH_BYTES:
+            batches.append(b''.join(batch))
+            batch, batch_bytes = [], 0
+        batch.append(payload)
+        batch_bytes += len(payload)
+    if batch:
+        batches.append(b''.join(batch))
+    return batches
+
+
+@cli.command()
+def main(events: int = 100_000) -> None:
+    sample = _build_events(events)
+
+    for value_format, serializer in VALUE_SERIALIZERS.items():
+        started_at = time.process_time()
+        payloads = [serializer(event) for event in sample]
+        encode_us = (time.process_time() - started_at) / events * 1_000_000
+
+        started_at = time.process_time()
+        decode_batch(BenchmarkEvent, payloads)
+        decode_us = (time.process_time() - started_at) / events * 1_000_000
+
+        raw_bytes = sum(map(len, payloads)) / events
+        typer.echo(
+            f'{value_format:>8}: encode {encode_us:.2f} us/event, decode {decode_us:.2f} us/event, '
+            f'{raw_bytes:.1f} bytes/event'
+        )
+
+        batches = _split_batches(payloads)
+        for codec_name, (is_available, encode) in CODECS.items():
+            if not is_available():
+                typer.echo(f'{"":>8}  {codec_name}: not installed')
+                continue
+
+            started_at = time.process_time()
+            compressed_bytes = sum(len(encode(batch)) for batch in batches) / events
+            compress_us = (time.process_time() - started_at) / events * 1_000_000
+            typer.echo(
+                f'{"":>8}  {codec_name}: {compressed_bytes:.1f} bytes/event '
+                f'({compressed_bytes / raw_bytes:.0%}), compress {compress_us:.2f} us/event'
+            )
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,247 @@
+import asyncio
+import os
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from contextlib import suppress
+from logging import getLogger
+from typing import Any, Literal
+
+from clickhouse_connect.driver import AsyncClient
+
+from ddutils.object_getter import get_object_by_path
+
+from share.clickhouse.metrics import (
+    CLICKHOUSE_BUFFER_FULL,
+    CLICKHOUSE_BUFFERED_ROWS,
+    CLICKHOUSE_INSERT_DURATION,
+    CLICKHOUSE_INSERT_ROWS,
+)
+
+logger = getLogger(__name__)
+close_db_connections = get_object_by_path(os.getenv('DB_CONNECTIONS_CLOSER_PATH'))
+
+InsertReason = Literal['rows', 'bytes', 'delay', 'flush', 'async_insert']
+
+
+class ClickhouseBufferFullError(Exception):
+    ...
+
+
+def _estimate_row_size(row: Sequence[Any]) -> int:
+    return sum(len(value) if isinstance(value, str | bytes) else 8 for value in row)
+
+
+class ClickhouseBufferedInserter:
+    """
+    Buffers rows inserted by many coroutines and writes them to a ClickHouse table in large batches.
+
+    The buffer is flushed in the background once it holds `max_rows` rows or about `max_bytes` bytes,
+    or `max_delay` seconds after the oldest buffered row. While the buffer holds `max_buffered_rows` rows,
+    `insert` waits for a flush and raises `ClickhouseBufferFullError` after `put_timeout` seconds.
+    Rows being inserted hold their buffer space until the insert succeeds,
+    rows of a failed insert are kept in the buffer and inserted by the next flush.
+
+    With `async_insert` rows are not buffered in the process: every `insert` is sent right away
+    with ClickHouse `async_insert` settings, so the server batches them into parts instead.
+
+    Call `start` at startup and `stop` at shutdown to insert the rest of the buffer,
+    e.g. in the FastAPI lifespan or `AsyncResourcesMiddleware`.
+
+    Args:
+        client_getter: Async callable returning a ClickHouse client, e.g. `clickhouse_client_registry`.
+        table: Table name.
+        column_names: Inserted columns, rows are sequences of values in the same order.
+        max_rows: Rows that trigger a flush, also the max rows per insert.
+        max_bytes: Estimated bytes that trigger a flush.
+        max_delay: Max time a row waits in the buffer in seconds.
+        max_buffered_rows: Buffer capacity, `insert` waits while it's full.
+        put_timeout: Max time to wait for free buffer space in seconds.
+        async_insert: Send every insert with `async_insert` settings instead of buffering.
+        wait_for_async_insert: Wait until the server flushes an async insert, so errors are reported to the caller.
+
+    Example:
+        profile_event_inserter = ClickhouseBufferedInserter(
+            clickhouse_client_registry, 'profile_event', column_names=('profile_id', 'event_type', 'created_at')
+        )
+
+        await profile_event_inserter.insert([(profile_id, 'open_app', datetime.now())])
+    """
+
+    def __init__(
+        self,
+        client_getter: Callable[[], Awaitable[AsyncClient]],
+        table: str,
+        column_names: Sequence[str],
+        max_rows: int = 10_000,
+        max_bytes: int = 16_000_000,
+        max_delay: float = 1.0,
+        max_buffered_rows: int = 100_000,
+        put_timeout: float = 5.0,
+        async_insert: bool = False,
+        wait_for_async_insert: bool = True,
+    ):
+        if max_rows <= 0:
+            raise ValueError('`max_rows` must be greater than 0')
+        if max_buffered_rows < max_rows:
+            raise ValueError('`max_buffered_rows` must not be less than `max_rows`')
+
+        self.client_getter = client_getter
+        self.table = table
+        self.column_names = list(column_names)
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.max_buffered_rows = max_buffered_rows
+        self.put_timeout = put_timeout
+        self.async_insert = async_insert
+        self.async_insert_settings = {'async_insert': 1, 'wait_for_async_insert': int(wait_for_async_insert)}
+
+        self._rows: list[Sequence[Any]] = []
+        # Rows taken from the buffer by an insert in progress, counted against `max_buffered_rows`
+        self._inserting_rows = 0
+        self._bytes = 0
+        self._first_row_at: float | None = None
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._space_available = asyncio.Condition()
+        self._flush_lock = asyncio.Lock()
+        self._flusher: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if not self.async_insert and (self._flusher is None or self._flusher.done()):
+            self._stopping.clear()
+            self._flusher = asyncio.create_task(self._run_flusher())
+
+    async def stop(self) -> None:
+        """Lets the background flusher finish its current insert, stops it and inserts the rest of the buffer."""
+        if self._flusher is not None:
+            flusher, self._flusher = self._flusher, None
+            self._stopping.set()
+            self._wakeup.set()
+            await asyncio.wait([flusher])
+
+        await self.flush()
+
+    async def insert(self, rows: Sequence[Sequence[Any]]) -> None:
+        if not rows:
+            return
+
+        if self.async_insert:
+            await self._insert(rows, 'async_insert', self.async_insert_settings)
+            return
+
+        if len(rows) > self.max_buffered_rows:
+            raise ValueError('`rows` must not exceed `max_buffered_rows`')
+
+        await self.start()
+        async with self._space_available:
+            try:
+                await asyncio.wait_for(
+                    self._space_available.wait_for(
+                        lambda: len(self._rows) + self._inserting_rows + len(rows) <= self.max_buffered_rows
+                    ),
+                    self.put_timeout,
+                )
+            except TimeoutError:
+                CLICKHOUSE_BUFFER_FULL.labels(table=self.table).inc()
+                raise ClickhouseBufferFullError('Insert buffer is full') from None
+
+            self._put_rows(rows)
+
+    async def flush(self) -> None:
+        await self._flush('flush')
+
+    def _put_rows(self, rows: Sequence[Sequence[Any]], front: bool = False) -> None:
+        if not self._rows:
+            self._first_row_at = time.monotonic()
+            self._wakeup.set()
+
+        if front:
+            self._rows[:0] = rows
+        else:
+            self._rows.extend(rows)
+        self._bytes += sum(map(_estimate_row_size, rows))
+        CLICKHOUSE_BUFFERED_ROWS.labels(table=self.table).inc(len(rows))
+
+        if len(self._rows) >= self.max_rows or self._bytes >= self.max_bytes:
+            self._wakeup.set()
+
+    async def _take_rows(self) -> list[Sequence[Any]]:
+        async with self._space_available:
+            rows = self._rows[: self.max_rows]
+            del self._rows[: self.max_rows]
+            self._bytes = max(0, self._bytes - sum(map(_estimate_row_size, rows))) if self._rows else 0
+            self._first_row_at = time.monotonic() if self._rows else None
+            self._inserting_rows += len(rows)
+
+        CLICKHOUSE_BUFFERED_ROWS.labels(table=self.table).dec(len(rows))
+        return rows
+
+    async def _flush(self, reason: InsertReason) -> None:
+        async with self._flush_lock:
+            while rows := await self._take_rows():
+                try:
+                    await self._insert(rows, reason)
+                except BaseException:
+                    async with self._space_available:
+                        self._inserting_rows -= len(rows)
+                        self._put_rows(rows, front=True)
+                    raise
+
+                async with self._space_available:
+                    self._inserting_rows -= len(rows)
+                    self._space_available.notify_all()
+
+    async def _insert(
+        self, rows: Sequence[Sequence[Any]], reason: InsertReason, settings: dict[str, Any] | None = None
+    ) -> None:
+        started_at = time.perf_counter()
+        result = 'error'
+        try:
+            client = await self.client_getter()
+            await client.insert(self.table, rows, column_names=self.column_names, settings=settings or {})
+            result = 'success'
+        finally:
+            CLICKHOUSE_INSERT_DURATION.labels(table=self.table, result=result).observe(time.perf_counter() - started_at)
+
+        CLICKHOUSE_INSERT_ROWS.labels(table=self.table, reason=reason).observe(len(rows))
+
+    def _get_flush_reason(self) -> InsertReason | None:
+        if len(self._rows) >= self.max_rows:
+            return 'rows'
+        if self._bytes >= self.max_bytes:
+            return 'bytes'
+        if self._first_row_at is not None and time.monotonic() - self._first_row_at >= self.max_delay:
+            return 'delay'
+        return None
+
+    async def _run_flusher(self) -> None:
+        """Runs in its own task, so the ClickHouse client it gets from `client_getter` is closed when it exits."""
+        try:
+            while not self._stopping.is_set():
+                timeout = None if self._first_row_at is None else self._first_row_at + self.max_delay - time.monotonic()
+                if timeout is None or timeout > 0:
+                    with suppress(TimeoutError):
+                        await asyncio.wait_for(self._wakeup.wait(), timeout)
+                self._wakeup.clear()
+
+                if self._stopping.is_set():
+                    return
+                if (reason := self._get_flush_reason()) is None:
+                    continue
+
+                try:
+                    await self._flush(reason)
+                except Exception:  # noqa: BLE001
+                    logger.exception(
+                        {
+                            'message': 'CLICKHOUSE_INSERTER: Failed to insert buffered rows, retrying',
+                            'table': self.table,
+                            'buffered_rows': len(self._rows),
+                        }
+                    )
+                    with suppress(TimeoutError):
+                        await asyncio.wait_for(self._stopping.wait(), self.max_delay)
+        finally:
+            if close_db_connections:
+                await close_db_connections()
@@ -0,0 +1,25 @@
+from share.prometheus.metrics import LazyMetric
+
+INSERT_ROWS_BUCKETS = (1, 10, 100, 500, 1_000, 5_000, 10_000, 50_000, 100_000, 500_000)
+INSERT_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CLICKHOUSE_INSERT_ROWS = LazyMetric(
+    'Histogram',
+    'clickhouse_insert_rows',
+    'Rows per insert by flush reason: rows, bytes, delay, flush, async_insert',
+    labelnames=('table', 'reason'),
+    buckets=INSERT_ROWS_BUCKETS,
+)
+CLICKHOUSE_INSERT_DURATION = LazyMetric(
+    'Histogram',
+    'clickhouse_insert_duration_seconds',
+    'Insert latency',
+    labelnames=('table', 'result'),
+    buckets=INSERT_DURATION_BUCKETS,
+)
+CLICKHOUSE_BUFFERED_ROWS = LazyMetric(
+    'Gauge', 'clickhouse_buffered_rows', 'Rows waiting in the insert buffer', labelnames=('table',), multiprocess_mode='livesum'
+)
+CLICKHOUSE_BUFFER_FULL = LazyMetric(
+    'Counter', 'clickhouse_buffer_full_total', 'Inserts rejected because the buffer stayed full', labelnames=('table',)
+)
@@ -1 +1,2 @@
+from .async_resources import AsyncResourcesMiddleware
 from .logging import TaskLoggingMiddleware
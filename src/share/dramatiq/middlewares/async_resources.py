@@ -0,0 +1,55 @@
+import asyncio
+import logging
+from collections.abc import Sequence
+from typing import Literal, Protocol
+
+from dramatiq.asyncio import get_event_loop_thread
+from dramatiq.middleware import Middleware
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncResource(Protocol):
+    async def start(self) -> None:
+        ...
+
+    async def stop(self) -> None:
+        ...
+
+
+class AsyncResourcesMiddleware(Middleware):
+    """
+    Starts async resources on the `AsyncIO` event loop after worker boot and stops them after worker shutdown,
+    once worker threads finished their running actors, e.g. warms up Kafka producers and delivers their buffered messages.
+
+    Place it after `AsyncIO`: its event loop is started before worker boot and stopped after worker shutdown,
+    and after-hooks run in reverse order, so the loop is still running when the resources are stopped.
+
+    Example:
+        middleware=[AsyncIO(), AsyncResourcesMiddleware([kafka_producer_repository_impl]), ...]
+    """
+
+    def __init__(self, resources: Sequence[AsyncResource]):
+        self.resources = resources
+
+    def after_worker_boot(self, broker, worker):  # noqa: ARG002
+        self._run('start')
+
+    def after_worker_shutdown(self, broker, worker):  # noqa: ARG002
+        self._run('stop')
+
+    def _run(self, method: Literal['start', 'stop']) -> None:
+        event_loop_thread = get_event_loop_thread()
+        if event_loop_thread is None:
+            logger.error({'message': f'Async resources are not {method}ed, AsyncIO middleware is not set up'})
+            return
+
+        results = event_loop_thread.run_coroutine(self._call_resources(method))
+        for resource, result in zip(self.resources, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    {'message': f'Failed to {method} async resource', 'resource': repr(resource), 'error': str(result)}
+                )
+
+    async def _call_resources(self, method: Literal['start', 'stop']) -> list:
+        return await asyncio.gather(*(getattr(resource, method)() for resource in self.resources), return_exceptions=True)
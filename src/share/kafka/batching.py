@@ -0,0 +1,35 @@
+from typing import Literal
+
+from share.kafka.settings import AdaptiveBatchConfig
+
+BatchSizeDecision = Literal['grow', 'shrink', 'hold']
+
+
+class AdaptiveBatchSizeController:
+    """
+    Multiplicatively grows or shrinks the consumer batch size within the config bounds.
+
+    Processing time above the target always shrinks the batch. Otherwise a lag above the target grows
+    the batch, but only after a full batch: a partially filled batch means the batch size isn't the limit.
+    """
+
+    def __init__(self, config: AdaptiveBatchConfig, batch_size: int):
+        self.config = config
+        self.batch_size = self._clamp(batch_size)
+
+    def update(self, records_count: int, processing_ms: float, lag_ms: float) -> BatchSizeDecision:
+        if processing_ms > self.config.target_processing_ms:
+            batch_size = self._clamp(int(self.batch_size * self.config.shrink_factor))
+        elif lag_ms > self.config.target_lag_ms and records_count >= self.batch_size:
+            batch_size = self._clamp(int(self.batch_size * self.config.growth_factor))
+        else:
+            return 'hold'
+
+        decision: BatchSizeDecision = 'hold'
+        if batch_size != self.batch_size:
+            decision = 'grow' if batch_size > self.batch_size else 'shrink'
+        self.batch_size = batch_size
+        return decision
+
+    def _clamp(self, batch_size: int) -> int:
+        return max(self.config.min_batch_size, min(self.config.max_batch_size, batch_size))
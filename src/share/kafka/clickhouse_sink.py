@@ -0,0 +1,140 @@
+import asyncio
+import time
+from abc import ABC
+from collections.abc import Awaitable, Callable, Sequence
+from contextlib import aclosing
+from logging import getLogger
+from typing import Any, ClassVar, Generic
+
+from clickhouse_connect.driver import AsyncClient
+
+from share.kafka.consumer import DomainT
+from share.kafka.consumer_maker import KafkaConsumerRepositoryMaker
+
+logger = getLogger(__name__)
+
+
+class BaseKafkaClickhouseSink(ABC, Generic[DomainT]):
+    """
+    Inserts consumed Kafka batches into a ClickHouse table.
+
+    Every batch is mapped to columns and inserted with a single native column-oriented insert.
+    Offsets are committed only after the insert is acknowledged, so a batch that failed to insert
+    is consumed again by the next run. Inserts carry an `insert_deduplication_token` built from
+    the batch offsets, so retries of the same batch are deduplicated by ClickHouse
+    (non-replicated tables need the `non_replicated_deduplication_window` setting).
+
+    Deduplication only covers retries within one run. After a crash, records of an uncommitted batch
+    can be consumed again in batches with other boundaries (adaptive batch size, partial fills, prefetch),
+    which get other tokens, so the table must tolerate duplicates, e.g. `ReplacingMergeTree` keyed by an event ID.
+
+    Override `to_columns` to transform entities, by default columns are taken from entity attributes
+    named after `column_names`.
+
+    Class Attributes:
+        table: ClickHouse table name
+        column_names: Inserted column names
+        client_getter: Async callable returning a ClickHouse client, e.g. `clickhouse_client_registry`
+        insert_retries: Retries of a failed insert with the same deduplication token
+        retry_backoff: Delay before the first retry in seconds, doubled for every next retry
+
+    Example:
+        class ProfileEventSink(BaseKafkaClickhouseSink[ProfileEvent]):
+            table = 'profile_event'
+            column_names = ('profile_id', 'event_type', 'created_at')
+            client_getter = clickhouse_client_registry
+
+        async with KafkaConsumerRepositoryMaker(
+            consumer_class=ProfileEventConsumerRepository,
+            partition=partition,
+            lock_class=RedisLock,
+            lock_kwargs={'redis_client': redis_client, 'timeout': 30, 'auto_renew': True},
+        ) as maker:
+            await ProfileEventSink().run(maker)
+    """
+
+    table: ClassVar[str]
+    column_names: ClassVar[tuple[str, ...]]
+    client_getter: ClassVar[Callable[[], Awaitable[AsyncClient]]]
+    insert_retries: ClassVar[int] = 3
+    retry_backoff: ClassVar[float] = 1.0
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        table = getattr(cls, 'table', None)
+        if not table:
+            raise ValueError('`table` class attribute must be set')
+        if not isinstance(table, str):
+            raise ValueError('`table` class attribute must be a str')
+
+        column_names = getattr(cls, 'column_names', None)
+        if not column_names:
+            raise ValueError('`column_names` class attribute must be set')
+        if not isinstance(column_names, tuple):
+            raise ValueError('`column_names` class attribute must be a tuple[str, ...]')
+
+        if getattr(cls, 'client_getter', None) is None:
+            raise ValueError('`client_getter` class attribute must be set')
+
+        insert_retries = getattr(cls, 'insert_retries', None)
+        if not isinstance(insert_retries, int) or insert_retries < 0:
+            raise ValueError('`insert_retries` class attribute must be an int >= 0')
+
+    def to_columns(self, batch: tuple[DomainT, ...]) -> list[Sequence[Any]]:
+        """Maps a batch to one sequence of values per column, in the order of `column_names`."""
+        return [[getattr(entity, column_name) for entity in batch] for column_name in self.column_names]
+
+    async def run(self, maker: KafkaConsumerRepositoryMaker[DomainT]) -> int:
+        """Inserts batches until the consumer is drained, offsets are committed after every insert, returns rows count."""
+        rows_count = 0
+        async with aclosing(maker.get_batches()) as batches:
+            async for batch in batches:
+                if batch:
+                    consumer_repo = maker.consumer_repo
+                    await self.insert(batch, self.build_deduplication_token(consumer_repo.topic, consumer_repo.batch_offsets))
+                    rows_count += len(batch)
+
+        return rows_count
+
+    async def insert(self, batch: tuple[DomainT, ...], deduplication_token: str | None = None) -> None:
+        columns = self.to_columns(batch)
+        settings = {'insert_deduplication_token': deduplication_token} if deduplication_token else {}
+
+        for attempt in range(self.insert_retries + 1):
+            started_at = time.perf_counter()
+            try:
+                client = await type(self).client_getter()
+                await client.insert(
+                    self.table, columns, column_names=list(self.column_names), column_oriented=True, settings=settings
+                )
+            except Exception:  # noqa: BLE001
+                if attempt == self.insert_retries:
+                    raise
+                logger.warning(
+                    {
+                        'message': 'KAFKA_CLICKHOUSE_SINK: Failed to insert batch, retrying',
+                        'table': self.table,
+                        'attempt': attempt + 1,
+                        'deduplication_token': deduplication_token,
+                    },
+                    exc_info=True,
+                )
+                await asyncio.sleep(self.retry_backoff * 2**attempt)
+            else:
+                logger.info(
+                    {
+                        'message': 'KAFKA_CLICKHOUSE_SINK: Inserted batch',
+                        'table': self.table,
+                        'rows_count': len(batch),
+                        'insert_time_ms': round((time.perf_counter() - started_at) * 1000, 2),
+                        'deduplication_token': deduplication_token,
+                    }
+                )
+                return
+
+    @staticmethod
+    def build_deduplication_token(topic: str, batch_offsets: dict[int, tuple[int, int]]) -> str:
+        """Builds a token unique for the offset ranges of a batch, e.g. `events:0:100-199,1:50-80`."""
+        ranges = ','.join(f'{partition}:{first}-{last}' for partition, (first, last) in sorted(batch_offsets.items()))
+        return f'{topic}:{ranges}'
@@ -1,14 +1,28 @@
+import asyncio
 import time
 from abc import ABC
-from collections.abc import AsyncIterator
+from collections.abc import AsyncGenerator, Mapping, Sequence
+from concurrent.futures import Executor
+from contextlib import aclosing
 from dataclasses import asdict
+from datetime import datetime
 from logging import getLogger
-from typing import ClassVar, Generic, Protocol, Self, TypeVar, get_args
-
-import msgpack
-from aiokafka import AIOKafkaConsumer, TopicPartition
-
-from share.kafka.settings import ConsumerConfig
+from typing import Any, ClassVar, Generic, NamedTuple, Protocol, Self, TypeVar, cast, get_args
+
+from aiokafka import AIOKafkaConsumer, ConsumerRecord, TopicPartition
+
+from share.kafka.batching import AdaptiveBatchSizeController
+from share.kafka.metrics import (
+    KAFKA_CONSUMER_BATCH_SIZE,
+    KAFKA_CONSUMER_BATCH_SIZE_DECISIONS,
+    KAFKA_CONSUMER_BYTES,
+    KAFKA_CONSUMER_LAG,
+    KAFKA_CONSUMER_RECORDS,
+    KAFKA_CONSUMER_STAGE_DURATION,
+)
+from share.kafka.serialization import decode_batch
+from share.kafka.settings import AdaptiveBatchConfig, ConsumerConfig
+from share.prometheus.metrics import observe_duration
 
 logger = getLogger(__name__)
 
@@ -19,13 +33,33 @@ class Deserializable(Protocol):
         ...
 
 
-DomainT = TypeVar('DomainT', bound=Deserializable)
+class RawRecord(NamedTuple):
+    """Undecoded record, consume `BaseKafkaConsumerRepository[RawRecord]` to skip deserialization."""
+
+    key: bytes | None
+    value: bytes | None  # None for tombstones
+    partition: int
+    offset: int
+    timestamp: int
+
+
+DomainT = TypeVar('DomainT', bound=Deserializable | tuple)
+
+RecordBatch = dict[TopicPartition, list[ConsumerRecord]]
+
+
+class DecodedBatch(NamedTuple):
+    records: RecordBatch
+    values: tuple[Any, ...]
 
 
 class BaseKafkaConsumerRepository(ABC, Generic[DomainT]):
     """
     Base async Kafka consumer repository.
 
+    The domain type defines how records are decoded: a domain model, a partial model or a `NamedTuple`
+    with only the needed fields (projection), or `RawRecord` to get undecoded keys and values.
+
     Class Attributes:
         bootstrap_servers: Kafka servers address
         topic: Topic name
@@ -33,6 +67,11 @@ class BaseKafkaConsumerRepository(ABC, Generic[DomainT]):
         batch_size: Max records per poll
         poll_timeout_ms: Timeout for poll operation in milliseconds
         min_batch_fill_ratio: Minimum batch fill ratio to continue (0.0-1.0)
+        prefetch_depth: Number of batches fetched ahead while the current one is processed (0 disables prefetch)
+        executor_decode_threshold: Min batch size to decode in `decode_executor` instead of the event loop
+                                   (None decodes on the event loop)
+        decode_executor: Executor for decoding, e.g. `ProcessPoolExecutor` (None is the default thread pool)
+        adaptive_batch: Adaptive batch size config, `batch_size` is the initial size (None keeps it static)
         config: Consumer configuration
     """
 
@@ -42,9 +81,13 @@ class BaseKafkaConsumerRepository(ABC, Generic[DomainT]):
     batch_size: ClassVar[int] = 1_000
     poll_timeout_ms: ClassVar[int] = 10_000
     min_batch_fill_ratio: ClassVar[float] = 0.1
+    prefetch_depth: ClassVar[int] = 0
+    executor_decode_threshold: ClassVar[int | None] = None
+    decode_executor: ClassVar[Executor | None] = None
+    adaptive_batch: ClassVar[AdaptiveBatchConfig | None] = None
     config: ClassVar[ConsumerConfig] = ConsumerConfig()
 
-    _domain_class: ClassVar[type[Deserializable]]
+    _domain_class: ClassVar[type[Deserializable | tuple]]
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
@@ -94,16 +137,54 @@ class BaseKafkaConsumerRepository(ABC, Generic[DomainT]):
         if not (0 <= min_batch_fill_ratio <= 1):
             raise ValueError('`min_batch_fill_ratio` class attribute must be between 0 and 1')
 
+        prefetch_depth = getattr(cls, 'prefetch_depth', None)
+        if prefetch_depth is None:
+            raise ValueError('`prefetch_depth` class attribute must be set')
+        if not isinstance(prefetch_depth, int) or prefetch_depth < 0:
+            raise ValueError('`prefetch_depth` class attribute must be a non-negative integer')
+
+        executor_decode_threshold = getattr(cls, 'executor_decode_threshold', None)
+        if executor_decode_threshold is not None and (
+            not isinstance(executor_decode_threshold, int) or executor_decode_threshold <= 0
+        ):
+            raise ValueError('`executor_decode_threshold` class attribute must be a positive integer or None')
+
+        decode_executor = getattr(cls, 'decode_executor', None)
+        if decode_executor is not None and not isinstance(decode_executor, Executor):
+            raise ValueError('`decode_executor` class attribute must be an Executor or None')
+
+        adaptive_batch = getattr(cls, 'adaptive_batch', None)
+        if adaptive_batch is not None and not isinstance(adaptive_batch, AdaptiveBatchConfig):
+            raise ValueError('`adaptive_batch` class attribute must be an AdaptiveBatchConfig or None')
+
         config = getattr(cls, 'config', None)
         if config is None:
             raise ValueError('`config` class attribute must be set')
         if not isinstance(config, ConsumerConfig):
             raise ValueError('`config` class attribute must be a ConsumerConfig')
 
-    def __init__(self, partition: int):
-        self._partition = partition
-        self._topic_partition = TopicPartition(self.topic, partition)
+    def __init__(self, partition: int | None = None, partitions: Sequence[int] = ()):
+        """
+        Args:
+            partition: Partition to consume.
+            partitions: Partitions to consume with one consumer, batches interleave them fairly.
+        """
+        if (partition is None) == (not partitions):
+            raise ValueError('Either `partition` or `partitions` must be set')
+
+        self._partitions = (partition,) if partition is not None else tuple(partitions)
+        self._topic_partitions = [TopicPartition(self.topic, partition) for partition in self._partitions]
         self._processed_offsets: dict[TopicPartition, int] = {}
+        self._processing_batch: tuple[float, int, int] | None = None
+        self._batch_offsets: dict[int, tuple[int, int]] = {}
+        self._batch_size_controller = (
+            AdaptiveBatchSizeController(self.adaptive_batch, self.batch_size) if self.adaptive_batch else None
+        )
+        self._batch_size = self._batch_size_controller.batch_size if self._batch_size_controller else self.batch_size
+        self._rotation = 0
+        self._read_ahead_task: asyncio.Task | None = None
+        # First prefetched offset per partition, moved past every yielded batch
+        self._rewind_offsets: dict[TopicPartition, int] = {}
         self._create_consumer()
 
     def _create_consumer(self) -> None:
@@ -111,98 +192,370 @@ class BaseKafkaConsumerRepository(ABC, Generic[DomainT]):
             {
                 'message': 'KAFKA_CONSUMER: Creating consumer',
                 'topic': self.topic,
-                'partition': self._partition,
+                'partitions': self._partitions,
                 'group_id': self.group_id,
             }
         )
 
         self._consumer = AIOKafkaConsumer(
-            bootstrap_servers=self.bootstrap_servers,
-            group_id=self.group_id,
-            value_deserializer=lambda v: self._domain_class.model_validate(msgpack.loads(v)),
-            **asdict(self.config),
+            bootstrap_servers=self.bootstrap_servers, group_id=self.group_id, **asdict(self.config)
         )
-        self._consumer.assign([self._topic_partition])
+        self._consumer.assign(self._topic_partitions)
+
+    @property
+    def batch_offsets(self) -> dict[int, tuple[int, int]]:
+        """First and last offset per partition of the batch being processed, e.g. to build idempotency keys."""
+        return self._batch_offsets
 
     async def start(self) -> None:
         await self._consumer.start()
 
         logger.info(
-            {'message': 'KAFKA_CONSUMER: Started', 'topic': self.topic, 'partition': self._partition, 'group_id': self.group_id}
+            {
+                'message': 'KAFKA_CONSUMER: Started',
+                'topic': self.topic,
+                'partitions': self._partitions,
+                'group_id': self.group_id,
+            }
         )
 
     async def stop(self) -> None:
+        """Stops the consumer. A read-ahead left by an iteration that wasn't closed is cancelled and rewound first."""
+        await self._stop_read_ahead(self._read_ahead_task, rewind=True)
         await self._consumer.stop()
         logger.info(
-            {'message': 'KAFKA_CONSUMER: Stopped', 'topic': self.topic, 'partition': self._partition, 'group_id': self.group_id}
+            {
+                'message': 'KAFKA_CONSUMER: Stopped',
+                'topic': self.topic,
+                'partitions': self._partitions,
+                'group_id': self.group_id,
+            }
         )
 
-    async def get_batches(self, timestamp_threshold_minutes: int | None = None) -> AsyncIterator[tuple[DomainT, ...]]:
+    async def get_batches(
+        self,
+        timestamp_threshold_minutes: int | None = None,
+        end_offsets: Mapping[int, int] | None = None,
+        end_timestamp: datetime | None = None,
+    ) -> AsyncGenerator[tuple[DomainT, ...], None]:
         """
         Returns an async iterator over batches of domain entities.
 
+        With bounds set, fetches are capped to the remaining distance to the bound, and partitions
+        that reached it are paused, so no records beyond the bound are fetched.
+
+        Iterate within `contextlib.aclosing`, so the iteration is cleaned up (prefetch is cancelled and rewound)
+        as soon as the loop stops early, e.g. when the handler raises.
+
         Args:
             timestamp_threshold_minutes: Only messages OLDER than this threshold (in minutes) are included.
                                          Defaults to None (no filtering).
+            end_offsets: Exclusive end offset per partition. Defaults to None (no bound).
+            end_timestamp: Only messages OLDER than this timestamp are included. Defaults to None (no bound).
         """
-        offset_limit: int | None = None
+        end_timestamp_ms: int | None = None
         if timestamp_threshold_minutes is not None:
-            threshold_ms = int(time.time() * 1000) - (timestamp_threshold_minutes * 60 * 1000)
-            offsets_for_times = await self._consumer.offsets_for_times({self._topic_partition: threshold_ms})
-            if self._topic_partition in offsets_for_times and offsets_for_times[self._topic_partition]:
-                offset_limit = offsets_for_times[self._topic_partition].offset
-
-        while True:
-            records_by_partition = await self._consumer.getmany(
-                self._topic_partition, timeout_ms=self.poll_timeout_ms, max_records=self.batch_size
-            )
-            records = records_by_partition.get(self._topic_partition, [])
-
-            logger.info(
-                {
-                    'message': 'KAFKA_CONSUMER: Retrieved batch',
-                    'topic': self.topic,
-                    'partition': self._partition,
-                    'records_count': len(records),
+            end_timestamp_ms = int(time.time() * 1000) - (timestamp_threshold_minutes * 60 * 1000)
+        if end_timestamp is not None:
+            timestamp_ms = int(end_timestamp.timestamp() * 1000)
+            end_timestamp_ms = timestamp_ms if end_timestamp_ms is None else min(end_timestamp_ms, timestamp_ms)
+
+        _end_offsets = await self._resolve_end_offsets(end_offsets or {}, end_timestamp_ms)
+
+        fetch_batches = self._prefetch_batches if self.prefetch_depth else self._fetch_decoded_batches
+        # Closed right away when the iteration stops early, so prefetched batches are dropped before the next commit
+        async with aclosing(fetch_batches(_end_offsets)) as batches:
+            async for batch in batches:
+                # Processing start, records count and the oldest of the last record timestamps, reported on commit
+                self._processing_batch = (
+                    time.perf_counter(),
+                    len(batch.values),
+                    min(records[-1].timestamp for records in batch.records.values()),
+                )
+                self._batch_offsets = {
+                    topic_partition.partition: (records[0].offset, records[-1].offset)
+                    for topic_partition, records in batch.records.items()
                 }
-            )
+                yield batch.values
 
-            if not records:
-                break
+                # Track offsets for commit
+                for topic_partition, records in batch.records.items():
+                    self._processed_offsets[topic_partition] = records[-1].offset + 1
 
-            # Filter by offset if timestamp threshold is set
-            if offset_limit is not None:
-                filtered_records = [r for r in records if r.offset < offset_limit]
-                last_record = filtered_records[-1] if filtered_records else None
-            else:
-                filtered_records = records
-                last_record = records[-1]
+    async def _resolve_end_offsets(
+        self, end_offsets: Mapping[int, int], end_timestamp_ms: int | None
+    ) -> dict[TopicPartition, int]:
+        resolved = {tp: end_offsets[tp.partition] for tp in self._topic_partitions if tp.partition in end_offsets}
 
-            if not last_record:
-                break
+        if end_timestamp_ms is not None:
+            offsets_for_times = await self._consumer.offsets_for_times(
+                {topic_partition: end_timestamp_ms for topic_partition in self._topic_partitions}
+            )
+            # No offset means there are no messages after the timestamp
+            for topic_partition, offset in offsets_for_times.items():
+                if offset is not None:
+                    resolved[topic_partition] = min(offset.offset, resolved.get(topic_partition, offset.offset))
+
+        return resolved
+
+    async def _fetch_batches(self, end_offsets: dict[TopicPartition, int]) -> AsyncGenerator[RecordBatch, None]:
+        positions = {tp: await self._consumer.position(tp) for tp in end_offsets}
+        active_partitions = [tp for tp in self._topic_partitions if tp not in end_offsets or positions[tp] < end_offsets[tp]]
+        paused_partitions = [tp for tp in self._topic_partitions if tp not in active_partitions]
+        if paused_partitions:
+            self._consumer.pause(*paused_partitions)
+
+        try:
+            while active_partitions:
+                remaining_records = {tp: end_offsets[tp] - positions[tp] for tp in active_partitions if tp in end_offsets}
+                with observe_duration(self._stage_duration('fetch')):
+                    fetched = await self._getmany(active_partitions, remaining_records)
+                records_count = sum(len(records) for records in fetched.values())
+
+                KAFKA_CONSUMER_RECORDS.labels(topic=self.topic, group_id=self.group_id).inc(records_count)
+                KAFKA_CONSUMER_BYTES.labels(topic=self.topic, group_id=self.group_id).inc(
+                    sum(len(r.key or b'') + len(r.value or b'') for records in fetched.values() for r in records)
+                )
+
+                logger.info(
+                    {
+                        'message': 'KAFKA_CONSUMER: Retrieved batch',
+                        'topic': self.topic,
+                        'partitions': [tp.partition for tp in fetched],
+                        'records_count': records_count,
+                    }
+                )
+
+                if not records_count:
+                    break
+
+                # Check if we should break (batch too small)
+                should_break = records_count < self._batch_size * self.min_batch_fill_ratio
+
+                # Partitions that reached the end offset are paused to stop background fetching
+                batch: RecordBatch = {}
+                for topic_partition, records in fetched.items():
+                    end_offset = end_offsets.get(topic_partition)
+                    if end_offset is not None:
+                        positions[topic_partition] = records[-1].offset + 1
+                        if positions[topic_partition] >= end_offset:
+                            records = [r for r in records if r.offset < end_offset]
+                            active_partitions.remove(topic_partition)
+                            paused_partitions.append(topic_partition)
+                            self._consumer.pause(topic_partition)
+                    if records:
+                        batch[topic_partition] = records
+
+                if not batch:
+                    break
+
+                yield batch
+
+                if should_break:
+                    break
+        finally:
+            if paused_partitions:
+                self._consumer.resume(*paused_partitions)
+
+    async def _fetch_decoded_batches(self, end_offsets: dict[TopicPartition, int]) -> AsyncGenerator[DecodedBatch, None]:
+        async with aclosing(self._fetch_batches(end_offsets)) as batches:
+            async for batch in batches:
+                yield DecodedBatch(records=batch, values=await self._decode(batch))
+
+    async def _decode(self, batch: RecordBatch) -> tuple[DomainT, ...]:
+        """
+        Decodes values of the batch at once. Batches of at least `executor_decode_threshold` records
+        are decoded in `decode_executor` to keep the event loop (and consumer heartbeats) responsive.
+        """
+        if self._domain_class is RawRecord:
+            return cast(
+                tuple[DomainT, ...],
+                tuple(
+                    RawRecord(record.key, record.value, record.partition, record.offset, record.timestamp)
+                    for records in batch.values()
+                    for record in records
+                ),
+            )
 
-            # Check if we should break (batch too small)
-            should_break = len(records) < self.batch_size * self.min_batch_fill_ratio
+        payloads: list[bytes] = []
+        for records in batch.values():
+            for record in records:
+                if record.value is None:
+                    raise ValueError(
+                        f'Tombstone at offset {record.offset} of partition {record.partition} cannot be decoded, '
+                        'consume `RawRecord` to handle tombstones'
+                    )
+                payloads.append(record.value)
+
+        started_at = time.perf_counter()
+        with observe_duration(self._stage_duration('deserialize')):
+            if self.executor_decode_threshold is not None and len(payloads) >= self.executor_decode_threshold:
+                loop = asyncio.get_running_loop()
+                values = await loop.run_in_executor(self.decode_executor, decode_batch, self._domain_class, payloads)
+            else:
+                values = decode_batch(self._domain_class, payloads)
 
-            yield tuple(record.value for record in filtered_records)
+        logger.info(
+            {
+                'message': 'KAFKA_CONSUMER: Decoded batch',
+                'topic': self.topic,
+                'records_count': len(payloads),
+                'decode_time_ms': round((time.perf_counter() - started_at) * 1000, 2),
+            }
+        )
+        return tuple(values)
 
-            # Track offset for commit
-            self._processed_offsets[self._topic_partition] = last_record.offset + 1
+    async def _getmany(
+        self, topic_partitions: list[TopicPartition], remaining_records: dict[TopicPartition, int]
+    ) -> RecordBatch:
+        """
+        Fetches up to the current batch size records, but no more than `remaining_records` of a partition.
+        With several partitions every partition gets an equal share of the batch, in rotating order;
+        the rest of the batch is filled by any partitions with records.
+        """
+        if len(topic_partitions) == 1:
+            max_records = min(self._batch_size, remaining_records.get(topic_partitions[0], self._batch_size))
+            return await self._consumer.getmany(*topic_partitions, timeout_ms=self.poll_timeout_ms, max_records=max_records)
+
+        self._rotation = (self._rotation + 1) % len(topic_partitions)
+        topic_partitions = topic_partitions[self._rotation :] + topic_partitions[: self._rotation]
+        share = -(-self._batch_size // len(topic_partitions))
+
+        batch: RecordBatch = {}
+        remaining = self._batch_size
+        for topic_partition in topic_partitions:
+            max_records = min(share, remaining, remaining_records.get(topic_partition, share))
+            fetched = await self._consumer.getmany(topic_partition, timeout_ms=0, max_records=max_records)
+            if records := fetched.get(topic_partition):
+                batch[topic_partition] = records
+                remaining -= len(records)
+            if not remaining:
+                return batch
+
+        # Any partition may fill the rest, so it's capped by the least remaining records of bounded partitions
+        max_records = min([remaining, *(count - len(batch.get(tp, ())) for tp, count in remaining_records.items())])
+        if max_records > 0:
+            timeout_ms = 0 if batch else self.poll_timeout_ms
+            fetched = await self._consumer.getmany(*topic_partitions, timeout_ms=timeout_ms, max_records=max_records)
+            for topic_partition, records in fetched.items():
+                batch.setdefault(topic_partition, []).extend(records)
+
+        return batch
+
+    async def _prefetch_batches(self, end_offsets: dict[TopicPartition, int]) -> AsyncGenerator[DecodedBatch, None]:
+        """
+        Same as `_fetch_batches`, but up to `prefetch_depth` next batches are fetched and deserialized
+        in background while the current one is processed.
 
-            if should_break:
-                break
+        Prefetched batches that are not yielded when the iteration stops early are dropped,
+        and the consumer is rewound to the first of their records. This happens when the iteration is closed,
+        or in `stop` if it wasn't.
+        """
+        queue: asyncio.Queue[DecodedBatch | Exception | None] = asyncio.Queue(maxsize=self.prefetch_depth)
+        self._rewind_offsets = {}
+        read_ahead_task = self._read_ahead_task = asyncio.create_task(self._read_ahead(end_offsets, queue))
+        completed = False
+
+        try:
+            while (batch := await queue.get()) is not None:
+                if isinstance(batch, Exception):
+                    raise batch
+
+                for topic_partition, records in batch.records.items():
+                    self._rewind_offsets[topic_partition] = records[-1].offset + 1
+
+                yield batch
+
+            completed = True
+        finally:
+            await self._stop_read_ahead(read_ahead_task, rewind=not completed)
+
+    async def _stop_read_ahead(self, read_ahead_task: asyncio.Task | None, rewind: bool) -> None:
+        """Cancels the read-ahead unless it was already stopped or replaced, and rewinds the consumer if asked."""
+        if read_ahead_task is None or read_ahead_task is not self._read_ahead_task:
+            return
+
+        self._read_ahead_task = None
+        read_ahead_task.cancel()
+        await asyncio.wait([read_ahead_task])
+
+        rewind_offsets, self._rewind_offsets = self._rewind_offsets, {}
+        if rewind:
+            for topic_partition, offset in rewind_offsets.items():
+                self._consumer.seek(topic_partition, offset)
+
+    async def _read_ahead(
+        self, end_offsets: dict[TopicPartition, int], queue: asyncio.Queue[DecodedBatch | Exception | None]
+    ) -> None:
+        try:
+            async with aclosing(self._fetch_batches(end_offsets)) as batches:
+                async for batch in batches:
+                    for topic_partition, records in batch.items():
+                        self._rewind_offsets.setdefault(topic_partition, records[0].offset)
+                    await queue.put(DecodedBatch(records=batch, values=await self._decode(batch)))
+        except Exception as e:  # noqa: BLE001
+            await queue.put(e)
+        else:
+            await queue.put(None)
 
     async def commit(self) -> None:
+        if self._processing_batch is not None:
+            self._on_batch_processed(*self._processing_batch)
+            self._processing_batch = None
+
         if self._processed_offsets:
-            await self._consumer.commit(self._processed_offsets)
+            with observe_duration(self._stage_duration('commit')):
+                await self._consumer.commit(self._processed_offsets)
+            self._report_lag()
 
         logger.info(
             {
                 'message': 'KAFKA_CONSUMER: Committed offsets',
                 'topic': self.topic,
-                'partition': self._partition,
+                'partitions': self._partitions,
                 'offsets': str(self._processed_offsets),
             }
         )
 
         self._processed_offsets.clear()
+
+    def _stage_duration(self, stage: str) -> Any:
+        return KAFKA_CONSUMER_STAGE_DURATION.labels(topic=self.topic, group_id=self.group_id, stage=stage)
+
+    def _report_lag(self) -> None:
+        for topic_partition, offset in self._processed_offsets.items():
+            highwater = self._consumer.highwater(topic_partition)
+            if highwater is not None:
+                KAFKA_CONSUMER_LAG.labels(
+                    topic=self.topic, group_id=self.group_id, partition=str(topic_partition.partition)
+                ).set(max(highwater - offset, 0))
+
+    def _on_batch_processed(self, started_at: float, records_count: int, timestamp_ms: int) -> None:
+        """Reports processing time of the last batch, measured from its yield to commit, and adapts the batch size."""
+        processing_time = time.perf_counter() - started_at
+        self._stage_duration('process').observe(processing_time)
+
+        if self._batch_size_controller is not None:
+            lag_ms = time.time() * 1000 - timestamp_ms
+            self._adapt_batch_size(self._batch_size_controller, records_count, processing_time * 1000, lag_ms)
+
+    def _adapt_batch_size(
+        self, controller: AdaptiveBatchSizeController, records_count: int, processing_ms: float, lag_ms: float
+    ) -> None:
+        decision = controller.update(records_count, processing_ms=processing_ms, lag_ms=lag_ms)
+        self._batch_size = controller.batch_size
+
+        KAFKA_CONSUMER_BATCH_SIZE_DECISIONS.labels(topic=self.topic, group_id=self.group_id, decision=decision).inc()
+        KAFKA_CONSUMER_BATCH_SIZE.labels(topic=self.topic, group_id=self.group_id).set(self._batch_size)
+
+        if decision != 'hold':
+            logger.info(
+                {
+                    'message': 'KAFKA_CONSUMER: Adapted batch size',
+                    'topic': self.topic,
+                    'decision': decision,
+                    'batch_size': self._batch_size,
+                    'processing_ms': round(processing_ms),
+                    'lag_ms': round(lag_ms),
+                }
+            )
@@ -1,6 +1,13 @@
-from typing import Any, AsyncIterator, Generic, Protocol, Self
+import asyncio
+from collections.abc import Sequence
+from contextlib import aclosing
+from logging import getLogger
+from typing import Any, AsyncGenerator, Generic, Protocol, Self, cast
 
 from share.kafka.consumer import BaseKafkaConsumerRepository, DomainT
+from share.kafka.metrics import KAFKA_CONSUMER_LOCKS
+
+logger = getLogger(__name__)
 
 
 class Lockable(Protocol):
@@ -22,51 +29,94 @@ class KafkaConsumerRepositoryMaker(Generic[DomainT]):
     """
     Context manager for Kafka consumer with distributed lock.
 
+    With `partitions` a single consumer reads all partitions whose locks are acquired,
+    partitions locked by other workers are skipped. If no lock is acquired, the lock error is raised.
+
     Example:
         async with KafkaConsumerRepositoryMaker(
             consumer_class=EventConsumerRepository,
             partition=0,
             lock_class=RedisLock,
-            lock_kwargs={'redis_client': redis_client, 'timeout': 300}
-        ) as maker:
-            async for batch in maker.get_batches():
+            lock_kwargs={'redis_client': redis_client, 'timeout': 30, 'auto_renew': True}
+        ) as maker, aclosing(maker.get_batches()) as batches:
+            async for batch in batches:
                 process(batch)
     """
 
+    consumer_repo: BaseKafkaConsumerRepository[DomainT]
+
     def __init__(
         self,
         consumer_class: type[BaseKafkaConsumerRepository[DomainT]],
-        partition: int,
+        partition: int | None = None,
+        *,
         lock_class: type[Lockable],
         lock_kwargs: dict[str, Any],
+        partitions: Sequence[int] = (),
     ):
-        lock_key = self.build_lock_key(consumer_class, partition)
-        self.lock = lock_class(key=lock_key, **lock_kwargs)  # type: ignore[call-arg]
-        self.consumer_repo = consumer_class(partition=partition)
+        if (partition is None) == (not partitions):
+            raise ValueError('Either `partition` or `partitions` must be set')
+
+        self.consumer_class = consumer_class
+        self.locks = {
+            partition: lock_class(key=self.build_lock_key(consumer_class, partition), **lock_kwargs)  # type: ignore[call-arg]
+            for partition in ((partition,) if partition is not None else partitions)
+        }
+        self._acquired_locks: dict[int, Lockable] = {}
 
     @staticmethod
     def build_lock_key(consumer_class: type[BaseKafkaConsumerRepository[Any]], partition: int) -> str:
         return f'{consumer_class.topic}_partition_{partition}'
 
-    async def get_batches(self) -> AsyncIterator[tuple[DomainT, ...]]:
+    async def get_batches(self) -> AsyncGenerator[tuple[DomainT, ...], None]:
         try:
-            async for batch in self.consumer_repo.get_batches():
-                yield batch
-                await self.checkpoint()
+            async with aclosing(self.consumer_repo.get_batches()) as batches:
+                async for batch in batches:
+                    yield batch
+                    await self.checkpoint()
         except Exception:  # noqa: BLE001
             pass
 
     async def checkpoint(self) -> None:
-        await self.lock.extend()
+        await asyncio.gather(*(lock.extend() for lock in self._acquired_locks.values()))
         await self.consumer_repo.commit()
 
+    async def _acquire_locks(self) -> None:
+        lock_error: Exception | None = None
+        for partition, lock in self.locks.items():
+            try:
+                await lock.acquire()
+            except Exception as e:  # noqa: BLE001
+                lock_error = e
+                KAFKA_CONSUMER_LOCKS.labels(topic=self.consumer_class.topic, outcome='not_acquired').inc()
+            else:
+                self._acquired_locks[partition] = lock
+                KAFKA_CONSUMER_LOCKS.labels(topic=self.consumer_class.topic, outcome='acquired').inc()
+
+        if not self._acquired_locks:
+            raise cast(Exception, lock_error)
+
+        if skipped_partitions := sorted(self.locks.keys() - self._acquired_locks.keys()):
+            logger.info(
+                {
+                    'message': 'KAFKA_CONSUMER_MAKER: Skipped partitions locked by other workers',
+                    'topic': self.consumer_class.topic,
+                    'partitions': skipped_partitions,
+                }
+            )
+
+    async def _release_locks(self) -> None:
+        acquired_locks, self._acquired_locks = self._acquired_locks, {}
+        await asyncio.gather(*(lock.release() for lock in acquired_locks.values()))
+
     async def __aenter__(self) -> Self:
-        await self.lock.acquire()
+        await self._acquire_locks()
 
         try:
+            self.consumer_repo = self.consumer_class(partitions=sorted(self._acquired_locks))
             await self.consumer_repo.start()
         except Exception as e:  # noqa: BLE001
-            await self.lock.release()
+            await self._release_locks()
             raise ConsumerStartError('Failed to start consumer') from e
 
         return self
@@ -76,4 +126,4 @@ class KafkaConsumerRepositoryMaker(Generic[DomainT]):
             await self.consumer_repo.commit()
             await self.consumer_repo.stop()
         finally:
-            await self.lock.release()
+            await self._release_locks()
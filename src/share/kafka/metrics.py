@@ -0,0 +1,54 @@
+from share.prometheus.metrics import LATENCY_BUCKETS, LazyMetric
+
+PROCESSING_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+KAFKA_CONSUMER_BATCH_SIZE = LazyMetric(
+    'Gauge',
+    'kafka_consumer_batch_size',
+    'Current max records per consumer batch',
+    labelnames=('topic', 'group_id'),
+    multiprocess_mode='mostrecent',
+)
+KAFKA_CONSUMER_BATCH_SIZE_DECISIONS = LazyMetric(
+    'Counter',
+    'kafka_consumer_batch_size_decisions_total',
+    'Adaptive batch size decisions',
+    labelnames=('topic', 'group_id', 'decision'),
+)
+KAFKA_CONSUMER_LAG = LazyMetric(
+    'Gauge',
+    'kafka_consumer_lag',
+    'High watermark minus committed offset',
+    labelnames=('topic', 'group_id', 'partition'),
+    multiprocess_mode='mostrecent',
+)
+KAFKA_CONSUMER_RECORDS = LazyMetric(
+    'Counter', 'kafka_consumer_records_total', 'Fetched records', labelnames=('topic', 'group_id')
+)
+KAFKA_CONSUMER_BYTES = LazyMetric(
+    'Counter', 'kafka_consumer_bytes_total', 'Fetched key and value bytes', labelnames=('topic', 'group_id')
+)
+KAFKA_CONSUMER_STAGE_DURATION = LazyMetric(
+    'Histogram',
+    'kafka_consumer_stage_duration_seconds',
+    'Duration of consumer batch stages: fetch, deserialize, process, commit',
+    labelnames=('topic', 'group_id', 'stage'),
+    buckets=PROCESSING_BUCKETS,
+)
+KAFKA_CONSUMER_LOCKS = LazyMetric(
+    'Counter', 'kafka_consumer_locks_total', 'Partition lock acquisitions by consumer maker', labelnames=('topic', 'outcome')
+)
+KAFKA_PRODUCER_SEND_DURATION = LazyMetric(
+    'Histogram',
+    'kafka_producer_send_duration_seconds',
+    'Time from send to delivery acknowledgement',
+    labelnames=('topic', 'result'),
+    buckets=LATENCY_BUCKETS,
+)
+KAFKA_PRODUCER_IN_FLIGHT = LazyMetric(
+    'Gauge',
+    'kafka_producer_in_flight_messages',
+    'Messages sent but not acknowledged yet',
+    labelnames=('topic',),
+    multiprocess_mode='livesum',
+)
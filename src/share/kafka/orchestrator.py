@@ -0,0 +1,158 @@
+import asyncio
+import os
+import random
+from collections import deque
+from collections.abc import Awaitable, Callable
+from contextlib import aclosing
+from logging import getLogger
+from typing import Any, Generic
+
+from aiokafka.admin import AIOKafkaAdminClient
+
+from ddutils.object_getter import get_object_by_path
+
+from share.kafka.consumer import BaseKafkaConsumerRepository, DomainT
+from share.kafka.consumer_maker import ConsumerStartError, KafkaConsumerRepositoryMaker, Lockable
+
+logger = getLogger(__name__)
+close_db_connections = get_object_by_path(os.getenv('DB_CONNECTIONS_CLOSER_PATH'))
+
+
+class KafkaPartitionOrchestrator(Generic[DomainT]):
+    """
+    Consumes all partitions of a topic within one worker with bounded concurrency.
+
+    Partitions are discovered from cluster metadata and shuffled, so concurrently started workers try
+    different partitions first. Up to `max_concurrency` partitions are consumed at once, each by its own
+    `KafkaConsumerRepositoryMaker`, and at most `max_partitions` per run, leaving the rest to other workers.
+    Partitions locked by other workers are retried for `retry_rounds` rounds after `retry_delay` seconds,
+    so partitions released by finished or crashed workers are picked up by idle workers.
+
+    Partitions are consumed in separate tasks, which the caller's DB connections cleanup doesn't reach,
+    so DB connections opened by `handler` are closed after each partition.
+
+    Example:
+        orchestrator = KafkaPartitionOrchestrator(
+            consumer_class=ProfileEventConsumerRepository,
+            lock_class=RedisLock,
+            lock_kwargs={'redis_client': redis_client, 'timeout': 30, 'auto_renew': True},
+            max_concurrency=4,
+        )
+        await orchestrator.run(handle_batch)
+    """
+
+    def __init__(
+        self,
+        consumer_class: type[BaseKafkaConsumerRepository[DomainT]],
+        lock_class: type[Lockable],
+        lock_kwargs: dict[str, Any],
+        max_concurrency: int = 4,
+        max_partitions: int | None = None,
+        retry_rounds: int = 1,
+        retry_delay: float = 5.0,
+    ):
+        if max_concurrency <= 0:
+            raise ValueError('`max_concurrency` must be greater than 0')
+        if max_partitions is not None and max_partitions <= 0:
+            raise ValueError('`max_partitions` must be greater than 0')
+
+        self.consumer_class = consumer_class
+        self.lock_class = lock_class
+        self.lock_kwargs = lock_kwargs
+        self.max_concurrency = max_concurrency
+        self.max_partitions = max_partitions
+        self.retry_rounds = retry_rounds
+        self.retry_delay = retry_delay
+
+    async def discover_partitions(self) -> list[int]:
+        admin_client = AIOKafkaAdminClient(bootstrap_servers=self.consumer_class.bootstrap_servers)
+        await admin_client.start()
+        try:
+            topics = await admin_client.describe_topics([self.consumer_class.topic])
+        finally:
+            await admin_client.close()
+
+        return sorted(partition['partition'] for topic in topics for partition in topic['partitions'])
+
+    async def run(self, handler: Callable[[tuple[DomainT, ...]], Awaitable[None]]) -> None:
+        partitions = await self.discover_partitions()
+        random.shuffle(partitions)
+
+        pending = deque(partitions)
+        # Partitions left to consume in this run, a slot is given back if the partition is locked by another worker
+        slots = asyncio.Semaphore(self.max_partitions or len(partitions))
+        for retry_round in range(self.retry_rounds + 1):
+            if retry_round:
+                await asyncio.sleep(self.retry_delay)
+
+            skipped: list[int] = []
+            workers_count = min(self.max_concurrency, len(pending))
+            consumed = await asyncio.gather(
+                *(self._consume_partitions(pending, skipped, handler, slots) for _ in range(workers_count))
+            )
+
+            logger.info(
+                {
+                    'message': 'KAFKA_ORCHESTRATOR: Finished round',
+                    'topic': self.consumer_class.topic,
+                    'round': retry_round,
+                    'consumed_partitions': sum(consumed),
+                    'skipped_partitions': sorted(skipped),
+                }
+            )
+
+            if not skipped or slots.locked():
+                break
+            pending = deque(skipped)
+
+    async def _consume_partitions(
+        self,
+        pending: deque[int],
+        skipped: list[int],
+        handler: Callable[[tuple[DomainT, ...]], Awaitable[None]],
+        slots: asyncio.Semaphore,
+    ) -> int:
+        """
+        Consumes pending partitions one by one until they or the slots run out, returns consumed count.
+        Runs in a task of its own, so DB connections scoped to it are closed after each partition.
+        """
+        consumed = 0
+        while pending and not slots.locked():
+            await slots.acquire()
+            partition = pending.popleft()
+            acquired = False
+            try:
+                async with KafkaConsumerRepositoryMaker(
+                    self.consumer_class, partition, lock_class=self.lock_class, lock_kwargs=self.lock_kwargs
+                ) as maker:
+                    acquired = True
+                    consumed += 1
+                    async with aclosing(maker.get_batches()) as batches:
+                        async for batch in batches:
+                            await handler(batch)
+            except ConsumerStartError:
+                logger.exception(
+                    {
+                        'message': 'KAFKA_ORCHESTRATOR: Failed to start consumer',
+                        'topic': self.consumer_class.topic,
+                        'partition': partition,
+                    }
+                )
+            except Exception:  # noqa: BLE001
+                if not acquired:
+                    # The partition is locked by another worker
+                    skipped.append(partition)
+                    slots.release()
+                    continue
+                logger.exception(
+                    {
+                        'message': 'KAFKA_ORCHESTRATOR: Failed to consume partition',
+                        'topic': self.consumer_class.topic,
+                        'partition': partition,
+                    }
+                )
+            finally:
+                if close_db_connections:
+                    await close_db_connections()
+
+        return consumed
@@ -0,0 +1,176 @@
+from abc import ABC
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager
+from datetime import datetime
+from logging import getLogger
+from typing import ClassVar
+from uuid import UUID, uuid4
+
+from pydantic import BaseModel
+from sqlalchemy import BigInteger, Column, DateTime, Identity, LargeBinary, delete, func, update
+from sqlmodel import Field, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from share.kafka.producer import BaseKafkaProducerRepository, Producible, SerializedRecord
+from share.sqlmodel.models.base import BaseSQLModel
+from share.sqlmodel.models.mixins.dates import CreatedDateMixin
+
+logger = getLogger(__name__)
+
+# Transaction-level advisory lock serializing relays, any constant unique among the project's advisory locks
+RELAY_LOCK_ID = 7_340_001
+
+
+class KafkaOutboxMessage(BaseModel):
+    outbox_message_id: UUID
+    topic: str
+    key: str | None
+    value: bytes
+    created_at: datetime | None = None
+    sent_at: datetime | None = None
+
+
+class KafkaOutboxMessageModel(BaseSQLModel[KafkaOutboxMessage], CreatedDateMixin, table=True):
+    outbox_message_id: UUID = Field(primary_key=True)
+    # Insertion order for claiming and publishing, the UUID primary key has none
+    sequence: int | None = Field(default=None, sa_column=Column(BigInteger, Identity(always=True), nullable=False, index=True))
+    topic: str
+    key: str | None
+    value: bytes = Field(sa_type=LargeBinary)
+    sent_at: datetime | None = Field(default=None, sa_type=DateTime)
+
+
+class BaseKafkaOutboxRepository(ABC):
+    """
+    Transactional outbox for Kafka events.
+
+    `create` and `bulk_create` serialize events and insert them in the current `Atomic` transaction,
+    so events are stored only if the transaction is committed and requests don't wait for Kafka.
+    `relay` claims stored events in batches in insertion order, publishes every batch at once
+    and deletes sent events (or marks them with `sent_at`). Relays are serialized with a Postgres advisory lock,
+    a relay started while another one is running returns right away.
+
+    A batch is settled up to the first event failed to publish: it and all later events stay in the outbox
+    and are published again by the next run, so the last publish of every key keeps the outbox order.
+    Later events that were published before the failure are published twice (at-least-once delivery).
+
+    Class Attributes:
+        atomic_class: Transaction context manager returning a session, e.g. `Atomic`
+        producer_repository: Producer repository serializing and publishing events
+        batch_size: Max events claimed per batch
+        delete_sent: Delete sent events instead of marking them with `sent_at`
+
+    Example:
+        class KafkaOutboxRepository(BaseKafkaOutboxRepository):
+            atomic_class = Atomic
+            producer_repository = kafka_producer_repository_impl
+
+        kafka_outbox_repository_impl = KafkaOutboxRepository()
+
+        async with Atomic():
+            await profile_repository_impl.create(profile)
+            await kafka_outbox_repository_impl.create(KafkaTopicName.PROFILE_EVENT, event)
+
+        # In a periodic task
+        await kafka_outbox_repository_impl.relay()
+    """
+
+    atomic_class: ClassVar[Callable[[], AbstractAsyncContextManager[AsyncSession]]]
+    producer_repository: ClassVar[BaseKafkaProducerRepository]
+    batch_size: ClassVar[int] = 1_000
+    delete_sent: ClassVar[bool] = True
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        if getattr(cls, 'atomic_class', None) is None:
+            raise ValueError('`atomic_class` class attribute must be set')
+
+        producer_repository = getattr(cls, 'producer_repository', None)
+        if producer_repository is None:
+            raise ValueError('`producer_repository` class attribute must be set')
+        if not isinstance(producer_repository, BaseKafkaProducerRepository):
+            raise ValueError('`producer_repository` class attribute must be a BaseKafkaProducerRepository')
+
+        batch_size = getattr(cls, 'batch_size', None)
+        if not isinstance(batch_size, int) or batch_size <= 0:
+            raise ValueError('`batch_size` class attribute must be an int greater than 0')
+
+    async def create(self, topic: str, event: Producible) -> None:
+        await self.bulk_create(topic, [event])
+
+    async def bulk_create(self, topic: str, events: list[Producible]) -> None:
+        async with self.atomic_class() as session:
+            session.add_all(
+                KafkaOutboxMessageModel(
+                    outbox_message_id=uuid4(),
+                    topic=topic,
+                    key=event.idempotent_key,
+                    value=self.producer_repository.serialize_value(event),
+                )
+                for event in events
+            )
+            await session.flush()
+
+    async def relay(self, max_batches: int | None = None) -> int:
+        """Relays batches until the outbox is drained or `max_batches` are relayed, returns the sent events count."""
+        sent_count = 0
+        batches_count = 0
+        while max_batches is None or batches_count < max_batches:
+            claimed_count, batch_sent_count = await self.relay_batch()
+            sent_count += batch_sent_count
+            batches_count += 1
+            if claimed_count < self.batch_size or not batch_sent_count:
+                break
+
+        return sent_count
+
+    async def relay_batch(self) -> tuple[int, int]:
+        """
+        Claims, publishes and settles a single batch, returns claimed and sent events count.
+        Returns zeros if another relay holds the lock.
+        """
+        async with self.atomic_class() as session:
+            if not (await session.exec(select(func.pg_try_advisory_xact_lock(RELAY_LOCK_ID)))).one():
+                return 0, 0
+
+            query = (
+                select(KafkaOutboxMessageModel)
+                .where(col(KafkaOutboxMessageModel.sent_at).is_(None))
+                .order_by(col(KafkaOutboxMessageModel.sequence))
+                .limit(self.batch_size)
+                .with_for_update()
+            )
+            messages = (await session.exec(query)).all()
+            if not messages:
+                return 0, 0
+
+            results = await self.producer_repository.bulk_create_serialized(
+                [SerializedRecord(topic=message.topic, key=message.key, value=message.value) for message in messages]
+            )
+            # Events after the first failure stay unsent, so they are published again after the failed one
+            sent_ids: list[UUID] = []
+            for message, result in zip(messages, results):
+                if isinstance(result, BaseException):
+                    break
+                sent_ids.append(message.outbox_message_id)
+            if sent_ids:
+                sent_filter = col(KafkaOutboxMessageModel.outbox_message_id).in_(sent_ids)
+                if self.delete_sent:
+                    statement = delete(KafkaOutboxMessageModel).where(sent_filter)
+                else:
+                    statement = update(KafkaOutboxMessageModel).where(sent_filter).values(sent_at=func.now())
+                await session.execute(statement)
+
+        if unsent_count := len(messages) - len(sent_ids):
+            errors = [result for result in results if isinstance(result, BaseException)]
+            logger.warning(
+                {
+                    'message': 'KAFKA_OUTBOX: Failed to publish events',
+                    'failed_count': len(errors),
+                    'unsent_count': unsent_count,
+                    'errors': sorted({str(error) for error in errors}),
+                }
+            )
+
+        return len(messages), len(sent_ids)
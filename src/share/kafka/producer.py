@@ -1,12 +1,20 @@
+import asyncio
+import time
 from abc import ABC
 from dataclasses import asdict
-from typing import ClassVar, Protocol
+from functools import partial
+from logging import getLogger
+from typing import ClassVar, NamedTuple, Protocol, get_args
 
-import msgpack
 from aiokafka import AIOKafkaProducer
+from aiokafka.structs import RecordMetadata
 
+from share.kafka.metrics import KAFKA_PRODUCER_IN_FLIGHT, KAFKA_PRODUCER_SEND_DURATION
+from share.kafka.serialization import VALUE_SERIALIZERS, ValueFormat
 from share.kafka.settings import ProducerConfig
 
+logger = getLogger(__name__)
+
 
 class Producible(Protocol):
     @property
@@ -17,32 +25,49 @@ class Producible(Protocol):
         ...
 
 
+class SerializedRecord(NamedTuple):
+    """A record with an already serialized value, e.g. stored in an outbox."""
+
+    topic: str
+    key: str | None
+    value: bytes
+
+
 class BaseKafkaProducerRepository(ABC):
     """
     Base async Kafka producer.
 
+    Every event loop gets its own producer, created on the first send and reused by all its tasks afterwards.
+    Call `start` at startup to warm it up and `stop` at shutdown to deliver buffered messages,
+    see `AsyncResourcesMiddleware` for Dramatiq workers.
+
     Class Attributes:
         bootstrap_servers: Kafka servers address
         config: Producer configuration
+        value_format: Value format, `msgpack` or `json` (serialized straight from the model, faster to produce)
 
     Example:
         from config.databases.kafka import bootstrap_servers
 
         class EventProducerRepository(BaseKafkaProducerRepository):
             bootstrap_servers = bootstrap_servers
-            config = ProducerConfig(acks=1, linger_ms=100)
+            config = ProducerConfig(acks=1, linger_ms=100, compression_type='zstd')
+            value_format = 'json'
 
         producer_repository_impl = EventProducerRepository()
-        await producer_repo_impl.bulk_create('topic', events)
+        results = await producer_repository_impl.bulk_create('topic', events)
+        failed_events = [event for event, result in zip(events, results) if isinstance(result, BaseException)]
     """
 
     bootstrap_servers: ClassVar[list[str]]
     config: ClassVar[ProducerConfig] = ProducerConfig()
+    value_format: ClassVar[ValueFormat] = 'msgpack'
 
-    _producer: ClassVar[AIOKafkaProducer | None] = None
+    _producers: ClassVar[dict[asyncio.AbstractEventLoop, asyncio.Task[AIOKafkaProducer]]]
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
+        cls._producers = {}
 
         bootstrap_servers = getattr(cls, 'bootstrap_servers', None)
         if not bootstrap_servers:
@@ -56,24 +81,141 @@ class BaseKafkaProducerRepository(ABC):
         if not isinstance(config, ProducerConfig):
             raise ValueError('`config` class attribute must be a ProducerConfig')
 
+        if cls.value_format not in get_args(ValueFormat):
+            raise ValueError(f'`value_format` class attribute must be one of {get_args(ValueFormat)}')
+
     @classmethod
-    async def _get_producer(cls) -> AIOKafkaProducer:
-        if cls._producer is None:
-            cls._producer = AIOKafkaProducer(
-                bootstrap_servers=cls.bootstrap_servers,
-                value_serializer=lambda v: msgpack.dumps(v.model_dump(mode='json')),
-                key_serializer=lambda v: str(v).encode('utf-8'),
-                **asdict(cls.config),
+    async def start(cls) -> None:
+        """Warms up the producer of the running event loop, if it fails, the producer is started on the first send."""
+        try:
+            await cls._get_producer()
+        except Exception:  # noqa: BLE001
+            logger.warning(
+                {'message': 'KAFKA_PRODUCER: Failed to start producer', 'bootstrap_servers': cls.bootstrap_servers},
+                exc_info=True,
             )
-            await cls._producer.start()
 
-        return cls._producer
+    @classmethod
+    async def flush(cls) -> None:
+        if (starting := cls._producers.get(asyncio.get_running_loop())) is not None:
+            producer = await asyncio.shield(starting)
+            await producer.flush()
+
+    @classmethod
+    async def stop(cls) -> None:
+        """Delivers buffered messages and stops the producer of the running event loop."""
+        starting = cls._producers.pop(asyncio.get_running_loop(), None)
+        if starting is None:
+            return
+
+        try:
+            producer = await starting
+        except Exception:  # noqa: BLE001
+            return
+        await producer.stop()
+
+    @classmethod
+    async def _get_producer(cls) -> AIOKafkaProducer:
+        loop = asyncio.get_running_loop()
+        starting = cls._producers.get(loop)
+        if starting is None:
+            for closed_loop in [producer_loop for producer_loop in cls._producers if producer_loop.is_closed()]:
+                del cls._producers[closed_loop]
+            starting = cls._producers[loop] = loop.create_task(cls._start_producer())
+
+        try:
+            # Shielded, so a cancelled caller doesn't cancel the start shared by all tasks of the loop
+            return await asyncio.shield(starting)
+        except Exception:
+            if cls._producers.get(loop) is starting:
+                del cls._producers[loop]
+            raise
+
+    @classmethod
+    async def _start_producer(cls) -> AIOKafkaProducer:
+        producer = AIOKafkaProducer(
+            bootstrap_servers=cls.bootstrap_servers,
+            value_serializer=cls.serialize_value,
+            key_serializer=lambda v: str(v).encode('utf-8'),
+            **asdict(cls.config),
+        )
+        try:
+            await producer.start()
+        except Exception:
+            await producer.stop()
+            raise
+
+        logger.info({'message': 'KAFKA_PRODUCER: Started producer', 'bootstrap_servers': cls.bootstrap_servers})
+        return producer
+
+    @classmethod
+    def serialize_value(cls, value: Producible | bytes) -> bytes:
+        """Serializes the event in the `value_format`, serialized values are passed through as is."""
+        if isinstance(value, bytes):
+            return value
+        return VALUE_SERIALIZERS[cls.value_format](value)
 
     async def create(self, topic: str, event: Producible):
         producer = await self._get_producer()
-        await producer.send(topic, key=event.idempotent_key, value=event)
+        await self._send(producer, topic, event.idempotent_key, event)
+
+    async def bulk_create(self, topic: str, events: list[Producible]) -> list[RecordMetadata | BaseException]:
+        """
+        Enqueues all events, then waits for their delivery at once.
+
+        Events are enqueued in order, so the order of events with the same key is kept, and batched
+        per partition by the producer. Returns delivery metadata or the error for every event.
+        """
+        producer = await self._get_producer()
+        deliveries = [await self._enqueue(producer, topic, event.idempotent_key, event) for event in events]
+        return await asyncio.gather(*deliveries, return_exceptions=True)
+
+    async def bulk_create_serialized(self, records: list[SerializedRecord]) -> list[RecordMetadata | BaseException]:
+        """The same as `bulk_create` for records of any topics with already serialized values."""
+        producer = await self._get_producer()
+        deliveries = [await self._enqueue(producer, record.topic, record.key, record.value) for record in records]
+        return await asyncio.gather(*deliveries, return_exceptions=True)
 
-    async def bulk_create(self, topic: str, events: list[Producible]):
+    async def bulk_create_and_flush(self, topic: str, events: list[Producible]) -> None:
+        """
+        Enqueues all events and flushes the producer once, without tracking delivery of every event.
+
+        Flush waits for all pending messages of the producer, including ones enqueued concurrently.
+        """
         producer = await self._get_producer()
         for event in events:
-            await producer.send(topic, key=event.idempotent_key, value=event)
+            await self._send(producer, topic, event.idempotent_key, event)
+        await producer.flush()
+
+    @classmethod
+    async def _enqueue(
+        cls, producer: AIOKafkaProducer, topic: str, key: str | None, value: Producible | bytes
+    ) -> asyncio.Future:
+        """Enqueues the value, an enqueue error is returned as a failed delivery."""
+        try:
+            return await cls._send(producer, topic, key, value)
+        except Exception as e:  # noqa: BLE001
+            delivery = asyncio.get_running_loop().create_future()
+            delivery.set_exception(e)
+            return delivery
+
+    @staticmethod
+    async def _send(producer: AIOKafkaProducer, topic: str, key: str | None, value: Producible | bytes) -> asyncio.Future:
+        """Enqueues the value, delivery latency and in-flight messages are reported to metrics."""
+        in_flight = KAFKA_PRODUCER_IN_FLIGHT.labels(topic=topic)
+        started_at = time.perf_counter()
+        in_flight.inc()
+        try:
+            delivery = await producer.send(topic, key=key, value=value)
+        except Exception:
+            in_flight.dec()
+            raise
+
+        delivery.add_done_callback(partial(_report_delivery, topic, started_at))
+        return delivery
+
+
+def _report_delivery(topic: str, started_at: float, delivery: asyncio.Future) -> None:
+    KAFKA_PRODUCER_IN_FLIGHT.labels(topic=topic).dec()
+    result = 'error' if delivery.cancelled() or delivery.exception() is not None else 'success'
+    KAFKA_PRODUCER_SEND_DURATION.labels(topic=topic, result=result).observe(time.perf_counter() - started_at)
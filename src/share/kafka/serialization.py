@@ -0,0 +1,72 @@
+from collections.abc import Callable, Sequence
+from functools import cache
+from typing import Any, Literal
+
+import msgpack
+import pydantic_core
+from pydantic import BaseModel, TypeAdapter
+
+ValueFormat = Literal['msgpack', 'json']
+
+# A JSON event is an object, while a msgpack map never starts with `{` (it's a positive fixint in msgpack)
+JSON_OBJECT_PREFIX = b'{'[0]
+
+
+def encode_msgpack(value: Any) -> bytes:
+    return msgpack.dumps(value.model_dump(mode='json'))
+
+
+def encode_json(value: Any) -> bytes:
+    """Serializes a pydantic model straight to JSON bytes, without building an intermediate dict."""
+    serializer = getattr(value, '__pydantic_serializer__', None)
+    if serializer is None:
+        return pydantic_core.to_json(value.model_dump(mode='json'))
+    return serializer.to_json(value)
+
+
+VALUE_SERIALIZERS: dict[ValueFormat, Callable[[Any], bytes]] = {'msgpack': encode_msgpack, 'json': encode_json}
+
+
+def _is_named_tuple(domain_class: type) -> bool:
+    return isinstance(domain_class, type) and issubclass(domain_class, tuple) and hasattr(domain_class, '_fields')
+
+
+@cache
+def _get_batch_adapter(domain_class: type) -> TypeAdapter | None:
+    if _is_named_tuple(domain_class) or (isinstance(domain_class, type) and issubclass(domain_class, BaseModel)):
+        return TypeAdapter(list.__class_getitem__(domain_class))
+    return None
+
+
+def _load(payload: bytes) -> Any:
+    if payload[:1] and payload[0] == JSON_OBJECT_PREFIX:
+        return pydantic_core.from_json(payload)
+    return msgpack.loads(payload)
+
+
+def decode_batch(domain_class: type, payloads: Sequence[bytes]) -> list[Any]:
+    """
+    Decodes msgpack or JSON payloads into domain entities, the format is detected by the first byte.
+
+    Pydantic models and named tuples are validated as a whole batch with a `TypeAdapter` in a single call,
+    other domain classes are validated one by one with `model_validate`. Named tuples are projections:
+    only their fields are taken from the payload. A batch of JSON payloads for a pydantic model
+    is validated straight from bytes.
+    A module-level function, so it can be run in a process pool.
+    """
+    adapter = _get_batch_adapter(domain_class)
+    if (
+        adapter is not None
+        and not _is_named_tuple(domain_class)
+        and all(payload[:1] and payload[0] == JSON_OBJECT_PREFIX for payload in payloads)
+    ):
+        return adapter.validate_json(b'[' + b','.join(payloads) + b']')
+
+    data = [_load(payload) for payload in payloads]
+    if _is_named_tuple(domain_class):
+        fields = domain_class._fields  # ty: ignore[unresolved-attribute]
+        data = [{field: item[field] for field in fields if field in item} for item in data]
+
+    if adapter is None:
+        return [domain_class.model_validate(item) for item in data]  # ty: ignore[unresolved-attribute]
+    return adapter.validate_python(data)
@@ -1,14 +1,28 @@
 from dataclasses import dataclass
 
+COMPRESSION_TYPES = (None, 'gzip', 'snappy', 'lz4', 'zstd')
+
 
 @dataclass(frozen=True)
 class ProducerConfig:
+    """
+    Producer options passed to `AIOKafkaProducer`.
+
+    `compression_type` compresses whole batches, consumers decompress them transparently.
+    Codecs other than `gzip` require `cramjam` (the `aiokafka[lz4,snappy,zstd]` extras).
+    """
+
     acks: int = 1
     linger_ms: int = 50
     max_batch_size: int = 32_000
     retry_backoff_ms: int = 500
     metadata_max_age_ms: int = 30_000
     request_timeout_ms: int = 5_000
+    compression_type: str | None = None
+
+    def __post_init__(self):
+        if self.compression_type not in COMPRESSION_TYPES:
+            raise ValueError(f'`compression_type` must be one of {COMPRESSION_TYPES}')
 
 
 @dataclass(frozen=True)
@@ -23,3 +37,28 @@ class ConsumerConfig:
     fetch_max_bytes: int = 125_000_000
     fetch_max_wait_ms: int = 1_000
     max_partition_fetch_bytes: int = 25_000_000
+
+
+@dataclass(frozen=True)
+class AdaptiveBatchConfig:
+    """
+    Bounds and targets of the adaptive consumer batch size.
+
+    The batch size shrinks when processing a batch takes longer than `target_processing_ms`,
+    and grows while the consumer lags more than `target_lag_ms` behind producers with full batches.
+    """
+
+    min_batch_size: int = 100
+    max_batch_size: int = 10_000
+    target_processing_ms: int = 5_000
+    target_lag_ms: int = 60_000
+    growth_factor: float = 1.5
+    shrink_factor: float = 0.5
+
+    def __post_init__(self):
+        if not (0 < self.min_batch_size <= self.max_batch_size):
+            raise ValueError('`min_batch_size` must be positive and not greater than `max_batch_size`')
+        if self.growth_factor <= 1:
+            raise ValueError('`growth_factor` must be greater than 1')
+        if not (0 < self.shrink_factor < 1):
+            raise ValueError('`shrink_factor` must be between 0 and 1')
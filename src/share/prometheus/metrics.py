@@ -0,0 +1,51 @@
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from functools import cached_property
+from time import perf_counter
+from typing import Any, Literal
+
+MetricType = Literal['Counter', 'Gauge', 'Histogram']
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LazyMetric:
+    """
+    Prometheus metric created in the default registry on first use.
+
+    `prometheus_client` chooses between single and multiprocess mode when it's imported,
+    and Dramatiq `Prometheus` middleware enables multiprocess mode only after the worker process boot.
+    Deferring the import to the first use lets metrics of worker processes be exported
+    by the Dramatiq exposition server, while the API process exports them via `start_metrics_server`.
+
+    Example:
+        REQUESTS = LazyMetric('Counter', 'requests_total', 'Total requests', labelnames=('method',))
+        REQUESTS.labels(method='get').inc()
+    """
+
+    def __init__(self, metric_type: MetricType, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs: Any):
+        self.metric_type = metric_type
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.kwargs = kwargs
+
+    @cached_property
+    def metric(self) -> Any:
+        import prometheus_client
+
+        metric_class = getattr(prometheus_client, self.metric_type)
+        return metric_class(self.name, self.documentation, labelnames=self.labelnames, **self.kwargs)
+
+    def labels(self, *args: Any, **kwargs: Any) -> Any:
+        return self.metric.labels(*args, **kwargs)
+
+
+@contextmanager
+def observe_duration(histogram: Any) -> Iterator[None]:
+    """Observes duration of the block in seconds, including blocks that raise."""
+    started_at = perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(perf_counter() - started_at)
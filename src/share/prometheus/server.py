@@ -0,0 +1,34 @@
+import os
+from logging import getLogger
+from wsgiref.simple_server import WSGIServer
+
+logger = getLogger(__name__)
+
+
+def start_metrics_server(port: int, addr: str = '0.0.0.0') -> WSGIServer | None:  # noqa: S104
+    """
+    Starts the exposition server on a separate port, so metrics are not served by the public app.
+
+    With several server processes `PROMETHEUS_MULTIPROC_DIR` must point to a directory shared by them
+    and emptied before the start: metrics of all processes are then aggregated, and whichever process binds
+    the port first serves them. Without it each process has its own registry and only one of them is exported.
+    Returns None when the port is already bound by another process.
+    """
+    import prometheus_client
+    from prometheus_client import multiprocess
+
+    registry = prometheus_client.REGISTRY
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+
+    try:
+        server, _ = prometheus_client.start_http_server(port, addr, registry=registry)
+    except OSError as e:
+        logger.info({'message': 'METRICS_SERVER: Port is already bound by another process', 'port': port, 'error': str(e)})
+        if not os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+            logger.warning(
+                {'message': 'METRICS_SERVER: Metrics of this process are not exported, set PROMETHEUS_MULTIPROC_DIR'}
+            )
+        return None
+    return server
@@ -1,15 +1,50 @@
+import asyncio
+import json
+import os
+import struct
+import time
 from abc import ABC
-from functools import cached_property
-from random import randint
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from contextlib import suppress
+from dataclasses import dataclass, field
+from functools import cached_property, partial
+from logging import getLogger
+from math import log
+from random import randint, random
 from typing import ClassVar, Generic, Protocol, Self, TypeVar, cast, get_args
+from uuid import uuid4
 
 from redis.asyncio import Redis
+from redis.exceptions import RedisError
 
 from ddutils.convertors import convert_camel_case_to_snake_case
+from ddutils.object_getter import get_object_by_path
 
-from share.redis.decorators import suppress_redis_errors
+from share.redis.codecs import DEFAULT_CODECS, CacheCodec, Compression, JsonCodec, PayloadFormat, compress, decompress
+from share.redis.decorators import suppress_cache_errors
+from share.redis.local_cache import LocalCache
+from share.redis.lock import AlreadyAcquiredError, RedisLock
+from share.redis.metrics import CacheMetrics, CacheStats
+
+logger = getLogger(__name__)
+close_db_connections = get_object_by_path(os.getenv('DB_CONNECTIONS_CLOSER_PATH'))
 
 JITTER_PERCENT = 10
+INVALIDATION_CHANNEL_PREFIX = 'cache_invalidation'
+TAGS_INVALIDATION_CHANNEL = f'{INVALIDATION_CHANNEL_PREFIX}:tags'
+TAG_KEY_PREFIX = ':cache_tag'
+TAG_TTL = 7 * 24 * 60 * 60  # 7 days, must be much longer than TTL of tagged entries
+INVALIDATION_RECONNECT_DELAY = 1.0  # seconds
+LOAD_POLL_INTERVAL = 0.05  # seconds
+# Keys of binary entries are versioned, so they don't clash with legacy JSON entries read by older deployments
+ENTRY_KEY_VERSION = 'v2'
+# Entry header: format version, payload format, compression, expires_at, delta
+ENTRY_FORMAT_VERSION = 2
+ENTRY_HEADER = struct.Struct('>BBBdd')
+# Since version 2 the header is followed by tags: count, then length, name and version of each tag
+TAGS_COUNT = struct.Struct('>H')
+TAG_NAME_LENGTH = struct.Struct('>H')
+TAG_VERSION = struct.Struct('>Q')
 
 
 class Serializable(Protocol):
@@ -29,6 +64,66 @@ class Stringable(Protocol):
 
 
 DomainT = TypeVar('DomainT', bound=Serializable)
+KeyT = TypeVar('KeyT', bound=Stringable)
+
+
+@dataclass
+class BulkGetResult(Generic[KeyT, DomainT]):
+    """
+    Result of `GenericCache.get_many`: found objects by their keys, keys that were not found
+    and keys known to be absent (negative caching).
+    """
+
+    hits: dict[KeyT, DomainT] = field(default_factory=dict)
+    misses: list[KeyT] = field(default_factory=list)
+    absent: list[KeyT] = field(default_factory=list)
+
+
+class Absent:
+    """
+    Marker returned by `GenericCache.get` for keys known to be absent (negative caching).
+    It's falsy, so `if value:` checks treat it as a miss.
+    """
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __repr__(self) -> str:
+        return 'ABSENT'
+
+
+ABSENT = Absent()
+
+
+@dataclass(frozen=True)
+class CacheEntry(Generic[DomainT]):
+    """
+    Cached domain object with its logical expiration.
+
+    Attributes:
+        value: Domain object, None for a tombstone of an absent key.
+        expires_at: Unix timestamp after which the entry is stale.
+        delta: Time spent to load the value in seconds, used for probabilistic early refresh.
+        tags: Versions of the entry tags at the time of writing.
+    """
+
+    value: DomainT | None
+    expires_at: float
+    delta: float = 0.0
+    tags: Mapping[str, int] = field(default_factory=dict)
+
+    @property
+    def is_absent(self) -> bool:
+        return self.value is None
+
+    def is_expired(self) -> bool:
+        return time.time() >= self.expires_at
+
+    def should_refresh(self, beta: float) -> bool:
+        """XFetch: the closer the expiration and the longer the load, the higher the probability to refresh."""
+        if beta <= 0 or self.delta <= 0:
+            return False
+        return time.time() - self.delta * beta * log(1.0 - random()) >= self.expires_at
 
 
 class GenericCache(ABC, Generic[DomainT]):
@@ -36,18 +131,62 @@ class GenericCache(ABC, Generic[DomainT]):
     GenericCache: An async generic caching repository for managing domain objects in Redis.
 
     This class provides a base implementation for caching domain objects in Redis.
-    It supports CRUD operations (`get`, `create`, `update`, `delete`)
-    and uses JSON serialization/deserialization to store and retrieve data.
+    It supports CRUD operations (`get`, `create`, `update`, `delete`),
+    their bulk variants (`get_many`, `set_many`, `delete_many`) executed in a single round-trip
+    and uses a pluggable codec (JSON by default) to store and retrieve data.
 
-    Domain class must implement `model_validate_json` and `model_dump_json` methods
+    With the default codec, domain class must implement `model_validate_json` and `model_dump_json` methods
     (compatible with Pydantic, msgspec, or custom implementations).
 
+    Entries are stored as bytes with a versioned header holding the payload format and compression,
+    so Redis client must be created with `decode_responses=False`. Entries written with another codec
+    are still readable, which allows switching codecs without flushing the cache.
+
+    Optionally, hot entries are kept in an in-process LRU cache (L1) in front of Redis.
+    Writes and deletes publish an invalidation message to a Redis channel, so other processes
+    drop their L1 copies. If an invalidation message is lost (e.g., during reconnect),
+    staleness is bounded by `local_cache_ttl`. Objects returned from L1 are shared, don't mutate them.
+    Call `start` and `stop` at startup and shutdown (e.g. in the FastAPI lifespan or `AsyncResourcesMiddleware`)
+    to subscribe to and unsubscribe from invalidation messages.
+
+    Redis errors are suppressed, so Redis unavailability doesn't break callers. Hits and misses per tier,
+    deserialization failures, suppressed errors and operation latency are reported to Prometheus
+    labeled by the key prefix, in-process hit/miss counters are available in `stats`.
+
+    `get_or_load` protects the loader from cache stampedes: concurrent callers in one process share
+    a single in-flight load, and across processes a short Redis lock lets only one loader run
+    while the others wait for the value to appear in the cache.
+
+    With `negative_ttl` set, keys the loader confirmed absent are cached as short-living tombstones,
+    so lookups of non-existent entities don't fall through to the database.
+
+    Entries can carry tags (e.g., `tenant:42`) for bulk invalidation. `invalidate_tags` increments
+    a version counter per tag, and entries written with an older tag version are treated as misses.
+    Tags are shared across cache classes. Reading a tagged entry from Redis costs one extra MGET of tag versions.
+
+    Each entry stores its logical expiration alongside the value. With `stale_ttl` set, entries are kept
+    in Redis for a grace window after the expiration: `get_or_load` serves such stale entries
+    while refreshing them in background, so the request path doesn't pay the load cost.
+
     Class Attributes:
         ttl (int): Time-to-live for cache entries in seconds. Default is 5 minutes.
-        redis_client (Redis): Redis client instance.
+        redis_client (Redis): Redis client instance with `decode_responses=False`.
+        codec (CacheCodec): Payload codec. Default is `JsonCodec`.
+        compression (Compression): Payload compression. Default is `Compression.NONE`.
+        compression_threshold (int): Min payload size in bytes to compress. Default is 1 KB.
+        local_cache_size (int): Max number of entries in the in-process cache. Default is 0 (disabled).
+        local_cache_ttl (int): Time-to-live for in-process cache entries in seconds, must be less than `ttl`.
+        load_lock_timeout (float): Time-to-live of the lock held by `get_or_load` while loading in seconds.
+        load_wait_timeout (float): Max time `get_or_load` waits for a value loaded by another process in seconds.
+            When exceeded, the value is loaded without the lock.
+        stale_ttl (int): Grace window after expiration in seconds, during which `get_or_load` serves the stale entry
+            and refreshes it in background. Default is 0 (disabled).
+        negative_ttl (int): Time-to-live for tombstones of absent keys in seconds. Default is 0 (disabled).
+        early_refresh_beta (float): XFetch beta for probabilistic early refresh in `get_or_load`,
+            values greater than 1 favor earlier refresh. Default is 0.0 (disabled).
 
     Example Usage:
-        from config.databases.redis import redis_client
+        from config.databases.redis import redis_bytes_client
 
         class MyDomain(BaseModel):
             id: int
@@ -55,19 +194,36 @@ class GenericCache(ABC, Generic[DomainT]):
 
         class MyDomainCache(GenericCache[MyDomain]):
             ttl = 10 * 60  # 10 minutes
-            redis_client = redis_client
+            redis_client = redis_bytes_client
+            codec = MsgpackCodec()
+            compression = Compression.ZSTD
 
         cache = MyDomainCache()
 
         domain = MyDomain(id=1, name="Test")
         await cache.create(key=domain.id, value=domain)
         retrieved = await cache.get(key=1)
+        loaded = await cache.get_or_load(key=2, loader=lambda: my_domain_repository_impl.get(2))
+
+        result = await cache.get_many(keys=[1, 2, 3])
+        result.hits  # {1: MyDomain(id=1, name='Test')}
+        result.misses  # [2, 3]
     """
 
     _domain_class: ClassVar[type[Serializable]]
 
     ttl: ClassVar[int] = 5 * 60  # 5 minutes
     redis_client: ClassVar[Redis]
+    codec: ClassVar[CacheCodec] = JsonCodec()
+    compression: ClassVar[Compression] = Compression.NONE
+    compression_threshold: ClassVar[int] = 1024
+    local_cache_size: ClassVar[int] = 0
+    local_cache_ttl: ClassVar[int] = 10
+    load_lock_timeout: ClassVar[float] = 10.0
+    load_wait_timeout: ClassVar[float] = 5.0
+    stale_ttl: ClassVar[int] = 0
+    negative_ttl: ClassVar[int] = 0
+    early_refresh_beta: ClassVar[float] = 0.0
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
@@ -78,46 +234,570 @@ class GenericCache(ABC, Generic[DomainT]):
 
         cls._domain_class = domain_class
 
+        redis_client = getattr(cls, 'redis_client', None)
+        if redis_client is not None and redis_client.get_connection_kwargs().get('decode_responses'):
+            raise ValueError('`redis_client` class attribute must be created with `decode_responses=False`')
+        if not isinstance(cls.codec, CacheCodec):
+            raise ValueError('`codec` class attribute must be a CacheCodec')
+        if not isinstance(cls.compression, Compression):
+            raise ValueError('`compression` class attribute must be a Compression')
+
+        if cls.local_cache_size < 0:
+            raise ValueError('`local_cache_size` class attribute must be greater than or equal to 0')
+        if cls.local_cache_size and not (0 < cls.local_cache_ttl < cls.ttl):
+            raise ValueError('`local_cache_ttl` class attribute must be positive and less than `ttl`')
+        if cls.stale_ttl < 0:
+            raise ValueError('`stale_ttl` class attribute must be greater than or equal to 0')
+        if cls.negative_ttl < 0:
+            raise ValueError('`negative_ttl` class attribute must be greater than or equal to 0')
+        if cls.early_refresh_beta < 0:
+            raise ValueError('`early_refresh_beta` class attribute must be greater than or equal to 0')
+
+    def __init__(self):
+        self._metrics = CacheMetrics(cache=self._key_prefix)
+        self._origin_id = uuid4().hex
+        self._invalidation_listener: asyncio.Task | None = None
+        self._inflight_loads: dict[str, asyncio.Future] = {}
+        self._local_cache: LocalCache[CacheEntry[DomainT]] | None = None
+        if self.local_cache_size:
+            self._local_cache = LocalCache(max_size=self.local_cache_size, ttl=self.local_cache_ttl)
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._metrics.stats
+
+    async def start(self) -> None:
+        """Subscribes to invalidation messages of the local cache. Does nothing if the local cache is disabled."""
+        if self._local_cache is not None:
+            self._ensure_invalidation_listener()
+
+    async def stop(self) -> None:
+        """Unsubscribes from invalidation messages and clears the local cache, which can't be kept consistent without them."""
+        listener, self._invalidation_listener = self._invalidation_listener, None
+        if listener is not None and not listener.done() and listener.get_loop() is asyncio.get_running_loop():
+            listener.cancel()
+            await asyncio.wait([listener])
+
+        if self._local_cache is not None:
+            self._local_cache.clear()
+
     @cached_property
     def _key_prefix(self) -> str:
         return convert_camel_case_to_snake_case(self._domain_class.__name__)
 
+    @cached_property
+    def _invalidation_channel(self) -> str:
+        return f'{INVALIDATION_CHANNEL_PREFIX}:{self._key_prefix}'
+
     @cached_property
     def _jitter(self) -> int:
         return self.ttl * JITTER_PERCENT // 100
 
     def _generate_key(self, key: Stringable) -> str:
-        """Generates a Redis key for the given identifier with the domain-specific prefix."""
-        return f':{self._key_prefix}:{key!s}'
+        """Generates a Redis key for the given identifier with the domain-specific prefix and the entry key version."""
+        return f':{self._key_prefix}:{ENTRY_KEY_VERSION}:{key!s}'
 
     def _generate_ttl(self) -> int:
         """Generates a TTL value with jitter."""
         return self.ttl + randint(-self._jitter, self._jitter)
 
-    @suppress_redis_errors
-    async def get(self, key: Stringable) -> DomainT | None:
-        """Retrieves and deserializes a domain object from the cache by its key."""
-        cached_data = await self.redis_client.get(self._generate_key(key))
+    def _make_entry(
+        self, value: DomainT | None, delta: float = 0.0, tags: Mapping[str, int] | None = None
+    ) -> tuple[CacheEntry[DomainT], int]:
+        """Builds an entry with a jittered logical expiry. Returns it with the Redis TTL including the grace window."""
+        tags = tags or {}
+        if value is None:
+            return CacheEntry(value=None, expires_at=time.time() + self.negative_ttl, tags=tags), self.negative_ttl
+
+        ttl = self._generate_ttl()
+        return CacheEntry(value=value, expires_at=time.time() + ttl, delta=delta, tags=tags), ttl + self.stale_ttl
+
+    def _serialize(self, entry: CacheEntry[DomainT]) -> bytes:
+        tags = _pack_tags(entry.tags)
+        if entry.value is None:
+            header = ENTRY_HEADER.pack(ENTRY_FORMAT_VERSION, PayloadFormat.ABSENT, Compression.NONE, entry.expires_at, 0.0)
+            return header + tags
+
+        payload = self.codec.encode(entry.value)
+
+        compression = Compression.NONE
+        if self.compression is not Compression.NONE and len(payload) >= self.compression_threshold:
+            compression = self.compression
+            payload = compress(payload, compression)
+
+        header = ENTRY_HEADER.pack(ENTRY_FORMAT_VERSION, self.codec.payload_format, compression, entry.expires_at, entry.delta)
+        return header + tags + payload
+
+    def _deserialize(self, cached_data: bytes | None) -> CacheEntry[DomainT] | None:
+        """Deserializes cached data into an entry. Returns None for empty, corrupted or unknown format data."""
         if not cached_data:
             return None
 
         try:
-            return cast(DomainT, self._domain_class.model_validate_json(cached_data))
+            version, payload_format, compression, expires_at, delta = ENTRY_HEADER.unpack_from(cached_data)
+            if version == 1:
+                tags, offset = {}, ENTRY_HEADER.size
+            elif version == ENTRY_FORMAT_VERSION:
+                tags, offset = _unpack_tags(cached_data, ENTRY_HEADER.size)
+            else:
+                return None
+
+            payload_format = PayloadFormat(payload_format)
+            if payload_format is PayloadFormat.ABSENT:
+                return CacheEntry(value=None, expires_at=expires_at, tags=tags)
+
+            codec = self.codec if self.codec.payload_format is payload_format else DEFAULT_CODECS[payload_format]
+            payload = decompress(cached_data[offset:], Compression(compression))
+
+            value = cast(DomainT, codec.decode(payload, self._domain_class))
+            return CacheEntry(value=value, expires_at=expires_at, delta=delta, tags=tags)
         except Exception:  # noqa: BLE001
+            self._metrics.deserialization_error()
+            return None
+
+    def _is_servable(self, entry: CacheEntry[DomainT]) -> bool:
+        """Checks the entry is fresh or within the grace window."""
+        return time.time() < entry.expires_at + self.stale_ttl
+
+    def _get_local(self, key: str) -> CacheEntry[DomainT] | None:
+        if self._local_cache is None:
+            return None
+
+        self._ensure_invalidation_listener()
+
+        entry = self._local_cache.get(key)
+        if entry is None or not self._is_servable(entry):
+            self._metrics.lookup('local', hit=False)
             return None
 
-    @suppress_redis_errors
-    async def create(self, key: Stringable, value: DomainT) -> None:
-        """Caches a new domain object or overwrites an existing one. Sets a TTL for the entry."""
+        self._metrics.lookup('local', hit=True)
+        return entry
+
+    def _set_local(self, key: str, entry: CacheEntry[DomainT]) -> None:
+        if self._local_cache is not None:
+            self._local_cache.put(key, entry)
+
+    async def _invalidate_local(self, *keys: str) -> None:
+        """Drops entries from the local cache and notifies other processes to drop their copies."""
+        if self._local_cache is None or not keys:
+            return
+
+        self._local_cache.delete(*keys)
+        await self.redis_client.publish(self._invalidation_channel, json.dumps({'origin': self._origin_id, 'keys': keys}))
+
+    def _ensure_invalidation_listener(self) -> None:
+        listener = self._invalidation_listener
+        if listener is not None and not listener.done() and listener.get_loop() is asyncio.get_running_loop():
+            return
+
+        self._invalidation_listener = asyncio.create_task(self._listen_invalidations())
+
+    async def _listen_invalidations(self) -> None:
+        """Subscribes to the invalidation channel and drops local entries changed by other processes."""
+        while True:
+            try:
+                async with self.redis_client.pubsub() as pubsub:
+                    await pubsub.subscribe(self._invalidation_channel, TAGS_INVALIDATION_CHANNEL)
+                    # Messages published while not subscribed are lost
+                    self._local_cache.clear()  # type: ignore[union-attr]
+
+                    async for message in pubsub.listen():
+                        if message['type'] == 'message':
+                            self._handle_invalidation(message['data'])
+            except RedisError as e:
+                logger.warning(
+                    {
+                        'message': 'CACHE: Invalidation listener disconnected',
+                        'channel': self._invalidation_channel,
+                        'error': str(e),
+                    }
+                )
+                self._local_cache.clear()  # type: ignore[union-attr]
+                await asyncio.sleep(INVALIDATION_RECONNECT_DELAY)
+
+    def _handle_invalidation(self, data: str | bytes) -> None:
+        try:
+            message = json.loads(data)
+        except ValueError:
+            return
+
+        if tags := set(message.get('tags', ())):
+            self._local_cache.delete_where(lambda entry: not tags.isdisjoint(entry.tags))  # type: ignore[union-attr]
+        elif message.get('origin') != self._origin_id:
+            self._local_cache.delete(*message.get('keys', ()))  # type: ignore[union-attr]
+
+    async def _get_tag_versions(self, tags: Iterable[str]) -> dict[str, int]:
+        """Retrieves current versions of tags with a single MGET. Tags that were never invalidated have version 0."""
+        tags = list(dict.fromkeys(tags))
+        if not tags:
+            return {}
+
+        versions = await self.redis_client.mget([f'{TAG_KEY_PREFIX}:{tag}' for tag in tags])
+        return {tag: int(version or 0) for tag, version in zip(tags, versions)}
+
+    @staticmethod
+    def _has_actual_tags(entry: CacheEntry[DomainT], tag_versions: Mapping[str, int]) -> bool:
+        return all(tag_versions.get(tag) == version for tag, version in entry.tags.items())
+
+    async def _get_entry(self, key: str) -> CacheEntry[DomainT] | None:
+        """Retrieves an entry by the Redis key. Entries within the grace window are returned too."""
+        entry = self._get_local(key)
+        if entry is not None:
+            return entry
+
+        entry = self._deserialize(await self.redis_client.get(key))
+        if entry is not None and entry.tags and not self._has_actual_tags(entry, await self._get_tag_versions(entry.tags)):
+            entry = None
+
+        if entry is None or not self._is_servable(entry):
+            self._metrics.lookup('redis', hit=False)
+            return None
+
+        self._metrics.lookup('redis', hit=True)
+        self._set_local(key, entry)
+        return entry
+
+    @suppress_cache_errors
+    async def get(self, key: Stringable) -> DomainT | Absent | None:
+        """
+        Retrieves and deserializes a domain object from the cache by its key. Stale entries are not returned.
+
+        Returns `ABSENT` for keys known to be absent and None for unknown keys.
+        """
+        entry = await self._get_entry(self._generate_key(key))
+        if entry is None or entry.is_expired():
+            return None
+        if entry.value is None:
+            return ABSENT
+        return entry.value
+
+    async def get_many(self, keys: Iterable[KeyT]) -> BulkGetResult[KeyT, DomainT]:
+        """
+        Retrieves domain objects for many keys with a single MGET (plus a single MGET of tag versions
+        if any of the entries is tagged).
+
+        Entries that are missing, stale or fail to deserialize are reported as misses,
+        so one corrupted entry doesn't fail the whole batch. Redis errors are suppressed
+        and reported as misses for all keys, so a result is always returned.
+        """
+        with self._metrics.observe('get_many'):
+            result: BulkGetResult[KeyT, DomainT] = BulkGetResult()
+
+            remote_keys: dict[str, KeyT] = {}
+            for key in keys:
+                _key = self._generate_key(key)
+                entry = self._get_local(_key)
+                if entry is None:
+                    remote_keys[_key] = key
+                else:
+                    self._add_to_result(result, key, entry)
+
+            if not remote_keys:
+                return result
+
+            try:
+                cached_items = await self.redis_client.mget(list(remote_keys))
+                entries = [self._deserialize(cached_data) for cached_data in cached_items]
+                tag_versions = await self._get_tag_versions(tag for entry in entries if entry for tag in entry.tags)
+            except RedisError as e:
+                self._metrics.suppressed_error('get_many', e)
+                entries, tag_versions = [None] * len(remote_keys), {}
+
+            for (_key, key), entry in zip(remote_keys.items(), entries):
+                if entry is not None and not self._has_actual_tags(entry, tag_versions):
+                    entry = None
+
+                if entry is None or not self._is_servable(entry):
+                    self._metrics.lookup('redis', hit=False)
+                    result.misses.append(key)
+                    continue
+
+                self._metrics.lookup('redis', hit=True)
+                self._set_local(_key, entry)
+                self._add_to_result(result, key, entry)
+
+            return result
+
+    @staticmethod
+    def _add_to_result(result: BulkGetResult[KeyT, DomainT], key: KeyT, entry: CacheEntry[DomainT]) -> None:
+        if entry.is_expired():
+            result.misses.append(key)
+        elif entry.value is None:
+            result.absent.append(key)
+        else:
+            result.hits[key] = entry.value
+
+    @suppress_cache_errors
+    async def get_or_load(
+        self, key: Stringable, loader: Callable[[], Awaitable[DomainT | None]], tags: Iterable[str] = ()
+    ) -> DomainT | None:
+        """
+        Retrieves a domain object from the cache or loads it with `loader` and caches the result.
+        If `loader` returns None and `negative_ttl` is set, the key is cached as absent.
+
+        Concurrent calls for the same key in one process share a single load, `loader` runs in the task of the first caller.
+        Across processes only the holder of the load lock calls `loader`, the others wait for the cached value.
+
+        A stale entry (within `stale_ttl` after expiration) is returned immediately and refreshed in background.
+        With `early_refresh_beta` set, a fresh entry is also refreshed in background with a probability
+        growing as its expiration approaches (XFetch).
+
+        The loaded entry is tagged with `tags`. Tag versions are read before calling `loader`,
+        so an invalidation during the load isn't lost.
+        """
+        entry = await self._get_entry_or_none(self._generate_key(key))
+        if entry is not None:
+            if entry.is_expired() or entry.should_refresh(beta=self.early_refresh_beta):
+                self._start_refresh(key, loader, tags)
+            return entry.value
+
         _key = self._generate_key(key)
-        await self.redis_client.set(_key, value.model_dump_json(), ex=self._generate_ttl())
+        while (inflight := self._get_inflight_load(_key)) is not None:
+            # Don't await the shared load itself, so a cancelled caller doesn't cancel it for the others
+            await asyncio.wait([inflight])
+            if not inflight.cancelled():
+                return inflight.result()
+
+        return await self._lead_load(key, loader, tags)
 
-    @suppress_redis_errors
-    async def update(self, key: Stringable, value: DomainT) -> None:
+    def _get_inflight_load(self, key: str) -> asyncio.Future | None:
+        inflight = self._inflight_loads.get(key)
+        if inflight is None or inflight.done() or inflight.get_loop() is not asyncio.get_running_loop():
+            return None
+        return inflight
+
+    async def _lead_load(
+        self, key: Stringable, loader: Callable[[], Awaitable[DomainT | None]], tags: Iterable[str] = ()
+    ) -> DomainT | None:
+        """
+        Loads the key in the caller's task and shares the result with concurrent callers.
+        The loader isn't moved to another task, so DB sessions it opens stay scoped to the caller's task.
+        """
+        _key = self._generate_key(key)
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight_loads[_key] = future
+        try:
+            value = await self._load(key, loader, tags)
+        except asyncio.CancelledError:
+            # Waiting callers start their own load
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark as retrieved, the error is raised to the caller
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._discard_inflight_load(_key, future)
+
+    def _start_refresh(
+        self, key: Stringable, loader: Callable[[], Awaitable[DomainT | None]], tags: Iterable[str] = ()
+    ) -> None:
+        """Starts a background refresh of the key unless it's already loading."""
+        _key = self._generate_key(key)
+        if self._get_inflight_load(_key) is None:
+            task = asyncio.create_task(self._refresh(key, loader, tags))
+            self._inflight_loads[_key] = task
+            task.add_done_callback(partial(self._discard_inflight_load, _key))
+
+    def _discard_inflight_load(self, key: str, future: asyncio.Future) -> None:
+        if self._inflight_loads.get(key) is future:
+            del self._inflight_loads[key]
+
+    async def _refresh(
+        self, key: Stringable, loader: Callable[[], Awaitable[DomainT | None]], tags: Iterable[str] = ()
+    ) -> DomainT | None:
+        """
+        Background refresh of a stale or soon-to-expire entry. Errors are logged, not raised.
+        Runs in its own task, so DB connections opened by `loader` are closed when it's done.
+        """
+        try:
+            return await self._load(key, loader, tags, refresh=True)
+        except Exception as e:  # noqa: BLE001
+            logger.warning({'message': 'CACHE: Background refresh failed', 'key': self._generate_key(key), 'error': str(e)})
+            return None
+        finally:
+            if close_db_connections:
+                await close_db_connections()
+
+    async def _load(
+        self, key: Stringable, loader: Callable[[], Awaitable[DomainT | None]], tags: Iterable[str] = (), refresh: bool = False
+    ) -> DomainT | None:
+        lock = RedisLock(
+            self.redis_client, key=f'{self._generate_key(key)}:load_lock', timeout=self.load_lock_timeout, label='cache_load'
+        )
+
+        try:
+            await lock.acquire()
+        except AlreadyAcquiredError:
+            entry = await self._wait_for_entry(key)
+            if entry is not None:
+                return entry.value
+            return await self._load_and_cache(key, loader, tags)
+        except RedisError:
+            return await self._load_and_cache(key, loader, tags)
+
+        try:
+            # The value could be cached by another process between the cache miss and the lock acquisition
+            entry = None if refresh else await self._get_fresh_entry(key)
+            if entry is not None:
+                return entry.value
+            return await self._load_and_cache(key, loader, tags)
+        finally:
+            with suppress(RedisError):
+                await lock.release()
+
+    async def _get_entry_or_none(self, key: str) -> CacheEntry[DomainT] | None:
+        """Same as `_get_entry`, but Redis errors are suppressed."""
+        try:
+            return await self._get_entry(key)
+        except RedisError as e:
+            self._metrics.suppressed_error('get_or_load', e)
+            return None
+
+    async def _get_fresh_entry(self, key: Stringable) -> CacheEntry[DomainT] | None:
+        entry = await self._get_entry_or_none(self._generate_key(key))
+        if entry is None or entry.is_expired():
+            return None
+        return entry
+
+    async def _wait_for_entry(self, key: Stringable) -> CacheEntry[DomainT] | None:
+        """Polls the cache until the entry loaded by another process appears or `load_wait_timeout` is exceeded."""
+        deadline = asyncio.get_running_loop().time() + self.load_wait_timeout
+        while asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(LOAD_POLL_INTERVAL)
+            entry = await self._get_fresh_entry(key)
+            if entry is not None:
+                return entry
+
+        return None
+
+    async def _load_and_cache(
+        self, key: Stringable, loader: Callable[[], Awaitable[DomainT | None]], tags: Iterable[str] = ()
+    ) -> DomainT | None:
+        try:
+            tag_versions = await self._get_tag_versions(tags)
+        except RedisError as e:
+            self._metrics.suppressed_error('get_or_load', e)
+            return await loader()
+
+        started_at = time.monotonic()
+        value = await loader()
+        if value is not None or self.negative_ttl:
+            try:
+                await self._store(
+                    {self._generate_key(key): value}, delta=time.monotonic() - started_at, tag_versions=tag_versions
+                )
+            except RedisError as e:
+                self._metrics.suppressed_error('get_or_load', e)
+        return value
+
+    async def _store(
+        self,
+        values: Mapping[str, DomainT | None],
+        delta: float = 0.0,
+        tags: Iterable[str] = (),
+        tag_versions: Mapping[str, int] | None = None,
+    ) -> None:
+        """
+        Caches domain objects by their Redis keys in a single pipeline. Each entry gets its own jittered TTL.
+        None values are cached as tombstones of absent keys.
+
+        Entries are tagged with already read `tag_versions`, or with current versions of `tags` if they aren't passed.
+        """
+        if tag_versions is None:
+            tag_versions = await self._get_tag_versions(tags)
+
+        entries: dict[str, CacheEntry[DomainT]] = {}
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for _key, value in values.items():
+                entry, ttl = self._make_entry(value, delta, tag_versions)
+                pipe.set(_key, self._serialize(entry), ex=ttl)
+                entries[_key] = entry
+            await pipe.execute()
+
+        await self._invalidate_local(*entries)
+        for _key, entry in entries.items():
+            self._set_local(_key, entry)
+
+    @suppress_cache_errors
+    async def create(self, key: Stringable, value: DomainT, tags: Iterable[str] = ()) -> None:
+        """Caches a new domain object or overwrites an existing one. Sets a TTL for the entry and tags it with `tags`."""
+        await self._store({self._generate_key(key): value}, tags=tags)
+
+    @suppress_cache_errors
+    async def set_many(self, items: Mapping[Stringable, DomainT], tags: Iterable[str] = ()) -> None:
+        """Caches many domain objects in a single pipeline. Each entry gets its own jittered TTL and is tagged with `tags`."""
+        if items:
+            await self._store({self._generate_key(key): value for key, value in items.items()}, tags=tags)
+
+    @suppress_cache_errors
+    async def mark_absent(self, *keys: Stringable) -> None:
+        """Caches keys as known to be absent for `negative_ttl` seconds. Does nothing if negative caching is disabled."""
+        if keys and self.negative_ttl:
+            await self._store(dict.fromkeys(self._generate_key(key) for key in keys))
+
+    async def update(self, key: Stringable, value: DomainT, tags: Iterable[str] = ()) -> None:
         """Updates a domain object in the cache. Alias for `create`."""
-        await self.create(key=key, value=value)
+        await self.create(key=key, value=value, tags=tags)
 
-    @suppress_redis_errors
+    @suppress_cache_errors
     async def delete(self, key: Stringable) -> None:
         """Removes a domain object from the cache by its key."""
-        await self.redis_client.delete(self._generate_key(key))
+        _key = self._generate_key(key)
+        await self.redis_client.delete(_key)
+        await self._invalidate_local(_key)
+
+    @suppress_cache_errors
+    async def delete_many(self, keys: Iterable[Stringable]) -> None:
+        """Removes domain objects for many keys with a single DEL."""
+        _keys = [self._generate_key(key) for key in keys]
+        if _keys:
+            await self.redis_client.delete(*_keys)
+            await self._invalidate_local(*_keys)
+
+    @suppress_cache_errors
+    async def invalidate_tags(self, *tags: str) -> None:
+        """
+        Invalidates all entries tagged with any of `tags` in all cache classes.
+        Increments tag versions in a single pipeline and notifies all processes to drop tagged L1 copies.
+        """
+        if not tags:
+            return
+
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(f'{TAG_KEY_PREFIX}:{tag}')
+                pipe.expire(f'{TAG_KEY_PREFIX}:{tag}', TAG_TTL)
+            await pipe.execute()
+
+        if self._local_cache is not None:
+            self._local_cache.delete_where(lambda entry: not set(tags).isdisjoint(entry.tags))
+        await self.redis_client.publish(TAGS_INVALIDATION_CHANNEL, json.dumps({'origin': self._origin_id, 'tags': tags}))
+
+
+def _pack_tags(tags: Mapping[str, int]) -> bytes:
+    packed = [TAGS_COUNT.pack(len(tags))]
+    for tag, version in tags.items():
+        name = tag.encode()
+        packed.extend((TAG_NAME_LENGTH.pack(len(name)), name, TAG_VERSION.pack(version)))
+    return b''.join(packed)
+
+
+def _unpack_tags(data: bytes, offset: int) -> tuple[dict[str, int], int]:
+    """Unpacks tags starting from `offset`. Returns tags with the offset right after them."""
+    (count,) = TAGS_COUNT.unpack_from(data, offset)
+    offset += TAGS_COUNT.size
+
+    tags = {}
+    for _ in range(count):
+        (name_length,) = TAG_NAME_LENGTH.unpack_from(data, offset)
+        offset += TAG_NAME_LENGTH.size
+        name = data[offset : offset + name_length].decode()
+        offset += name_length
+        (tags[name],) = TAG_VERSION.unpack_from(data, offset)
+        offset += TAG_VERSION.size
+
+    return tags, offset
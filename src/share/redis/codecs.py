@@ -0,0 +1,105 @@
+from abc import ABC, abstractmethod
+from enum import IntEnum
+from typing import Any, ClassVar
+
+
+class PayloadFormat(IntEnum):
+    ABSENT = 0  # tombstone without payload
+    JSON = 1
+    MSGPACK = 2
+
+
+class Compression(IntEnum):
+    NONE = 0
+    ZSTD = 1
+    LZ4 = 2
+
+
+class CacheCodec(ABC):
+    """
+    Base class for cache payload codecs.
+
+    The payload format is written to the entry header, so entries are decoded by the codec
+    of their format even after a cache switches to another codec.
+    """
+
+    payload_format: ClassVar[PayloadFormat]
+
+    @abstractmethod
+    def encode(self, value: Any) -> bytes:
+        ...
+
+    @abstractmethod
+    def decode(self, data: bytes, domain_class: type) -> Any:
+        ...
+
+
+class JsonCodec(CacheCodec):
+    """JSON codec based on `model_dump_json`/`model_validate_json` (Pydantic, msgspec or custom implementations)."""
+
+    payload_format = PayloadFormat.JSON
+
+    def encode(self, value: Any) -> bytes:
+        return value.model_dump_json().encode()
+
+    def decode(self, data: bytes, domain_class: type) -> Any:
+        return domain_class.model_validate_json(data)  # ty: ignore[unresolved-attribute]
+
+
+class PydanticJsonCodec(CacheCodec):
+    """JSON codec for Pydantic models, serializes straight to bytes with pydantic-core."""
+
+    payload_format = PayloadFormat.JSON
+
+    def encode(self, value: Any) -> bytes:
+        return value.__pydantic_serializer__.to_json(value)
+
+    def decode(self, data: bytes, domain_class: type) -> Any:
+        return domain_class.__pydantic_validator__.validate_json(data)  # ty: ignore[unresolved-attribute]
+
+
+class MsgpackCodec(CacheCodec):
+    """Msgpack codec for Pydantic models. Requires `msgpack` package."""
+
+    payload_format = PayloadFormat.MSGPACK
+
+    def encode(self, value: Any) -> bytes:
+        import msgpack
+
+        return msgpack.packb(value.model_dump(mode='json'))
+
+    def decode(self, data: bytes, domain_class: type) -> Any:
+        import msgpack
+
+        return domain_class.model_validate(msgpack.unpackb(data))  # ty: ignore[unresolved-attribute]
+
+
+DEFAULT_CODECS: dict[PayloadFormat, CacheCodec] = {PayloadFormat.JSON: JsonCodec(), PayloadFormat.MSGPACK: MsgpackCodec()}
+
+
+def compress(data: bytes, compression: Compression) -> bytes:
+    if compression is Compression.ZSTD:
+        import zstandard
+
+        return zstandard.compress(data)
+
+    if compression is Compression.LZ4:
+        import lz4.frame
+
+        return lz4.frame.compress(data)
+
+    return data
+
+
+def decompress(data: bytes, compression: Compression) -> bytes:
+    if compression is Compression.ZSTD:
+        import zstandard
+
+        return zstandard.decompress(data)
+
+    if compression is Compression.LZ4:
+        import lz4.frame
+
+        return lz4.frame.decompress(data)
+
+    return data
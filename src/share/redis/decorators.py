@@ -1,8 +1,11 @@
 from functools import wraps
-from typing import Any, Awaitable, Callable, TypeVar
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, TypeVar
 
 from redis.exceptions import RedisError
 
+if TYPE_CHECKING:
+    from share.redis.metrics import CacheMetrics
+
 T = TypeVar('T')
 
 
@@ -17,3 +20,23 @@ def suppress_redis_errors(func: Callable[..., Awaitable[T]]) -> Callable[..., Aw
             return None
 
     return wrapper
+
+
+def suppress_cache_errors(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T | None]]:
+    """
+    Decorator for cache operations to suppress Redis exceptions and return None on failure.
+    Operation latency and suppressed errors are reported to `_metrics` of the cache.
+    """
+    operation: str = getattr(func, '__name__', repr(func))
+
+    @wraps(func)
+    async def wrapper(self: Any, *args: Any, **kwargs: Any) -> T | None:
+        metrics: CacheMetrics = self._metrics
+        with metrics.observe(operation):
+            try:
+                return await func(self, *args, **kwargs)
+            except RedisError as e:
+                metrics.suppressed_error(operation, e)
+                return None
+
+    return wrapper
@@ -1,7 +1,100 @@
-from typing import Self
+import asyncio
+import time
+from collections.abc import Awaitable
+from contextlib import suppress
+from logging import getLogger
+from typing import Self, cast
+from uuid import uuid4
 
 from redis.asyncio import Redis
 from redis.asyncio.lock import Lock
+from redis.exceptions import LockNotOwnedError, RedisError
+
+from share.redis.metrics import LOCK_ACQUIRE_WAIT
+
+logger = getLogger(__name__)
+
+# KEYS: lock, queue, queue sequence
+# ARGV: token, lock ttl ms, waiter key prefix, wake key prefix, waiter ttl ms, enqueue flag
+FAIR_ACQUIRE_SCRIPT = """
+local head
+while true do
+    head = redis.call('zrange', KEYS[2], 0, 0)[1]
+    if not head or head == ARGV[1] or redis.call('exists', ARGV[3] .. head) == 1 then
+        break
+    end
+    redis.call('zrem', KEYS[2], head)
+end
+
+if redis.call('exists', KEYS[1]) == 0 and (not head or head == ARGV[1]) then
+    redis.call('set', KEYS[1], ARGV[1], 'px', ARGV[2])
+    redis.call('zrem', KEYS[2], ARGV[1])
+    redis.call('del', ARGV[3] .. ARGV[1], ARGV[4] .. ARGV[1])
+    return 1
+end
+
+if ARGV[6] == '1' then
+    if not redis.call('zscore', KEYS[2], ARGV[1]) then
+        redis.call('zadd', KEYS[2], redis.call('incr', KEYS[3]), ARGV[1])
+    end
+    redis.call('set', ARGV[3] .. ARGV[1], 1, 'px', ARGV[5])
+    redis.call('pexpire', KEYS[2], ARGV[5])
+    redis.call('pexpire', KEYS[3], ARGV[5])
+end
+return 0
+"""
+
+# Wakes up the first alive waiter of the queue KEYS[2], dropping dead ones.
+# ARGV: token, waiter key prefix, wake key prefix, waiter ttl ms
+WAKE_NEXT_SCRIPT = """
+while true do
+    local head = redis.call('zrange', KEYS[2], 0, 0)[1]
+    if not head then
+        break
+    end
+    if redis.call('exists', ARGV[2] .. head) == 1 then
+        redis.call('rpush', ARGV[3] .. head, 1)
+        redis.call('pexpire', ARGV[3] .. head, ARGV[4])
+        break
+    end
+    redis.call('zrem', KEYS[2], head)
+end
+"""
+
+# KEYS: lock, queue
+# ARGV: token, waiter key prefix, wake key prefix, waiter ttl ms
+FAIR_RELEASE_SCRIPT = f"""
+if redis.call('get', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('del', KEYS[1])
+{WAKE_NEXT_SCRIPT}
+return 1
+"""
+
+# KEYS: lock, queue
+# ARGV: token, waiter key prefix, wake key prefix, waiter ttl ms
+FAIR_LEAVE_SCRIPT = f"""
+redis.call('zrem', KEYS[2], ARGV[1])
+redis.call('del', ARGV[2] .. ARGV[1], ARGV[3] .. ARGV[1])
+if redis.call('exists', KEYS[1]) == 0 then
+{WAKE_NEXT_SCRIPT}
+end
+"""
+
+# KEYS: lock key
+# ARGV: token, time ms, replace ttl flag
+FAIR_EXTEND_SCRIPT = """
+if redis.call('get', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+local ttl = 0
+if ARGV[3] == '0' then
+    ttl = math.max(redis.call('pttl', KEYS[1]), 0)
+end
+redis.call('pexpire', KEYS[1], ttl + ARGV[2])
+return 1
+"""
 
 
 class AlreadyAcquiredError(Exception):
@@ -9,9 +102,58 @@ class AlreadyAcquiredError(Exception):
 
 
 class RedisLock:
-    def __init__(self, redis_client: Redis, key: str, timeout: float = 10.0, blocking: bool = False):
+    """
+    Distributed lock based on redis-py `Lock`.
+
+    A blocking lock polls Redis with sleeps until it's acquired or `timeout` elapses,
+    use `FairRedisLock` for keys with many concurrent waiters.
+    Acquire wait time is reported to the `redis_lock_acquire_wait_seconds` histogram.
+
+    With `auto_renew` a background watchdog resets the lock time-to-live every `timeout * renew_ratio` seconds
+    while the lock is held, so a short `timeout` can be used for fast failover after a crash.
+    If the lock can't be renewed, `ownership_lost` is set and, with `cancel_on_loss`, the task
+    that acquired the lock is cancelled. Release stops the watchdog and is a no-op after the loss.
+
+    Args:
+        redis_client: Redis client.
+        key: Lock key.
+        timeout: Lock time-to-live and max time to wait for a blocking lock in seconds.
+        blocking: Wait for the lock instead of raising `AlreadyAcquiredError` right away.
+        label: Low-cardinality name of the lock in metrics.
+        auto_renew: Renew the lock in background while it's held.
+        renew_ratio: Fraction of `timeout` between renewals (0.0-1.0).
+        cancel_on_loss: Cancel the task that acquired the lock when the ownership is lost.
+
+    Example:
+        async with RedisLock(redis_client, 'some_key', timeout=10, auto_renew=True, cancel_on_loss=True):
+            await do_something_long()
+    """
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        key: str,
+        timeout: float = 10.0,
+        blocking: bool = False,
+        label: str = 'default',
+        auto_renew: bool = False,
+        renew_ratio: float = 1 / 3,
+        cancel_on_loss: bool = False,
+    ):
+        if not (0 < renew_ratio < 1):
+            raise ValueError('`renew_ratio` must be between 0 and 1')
+
         blocking_timeout = timeout if blocking else None
+        self.redis_client = redis_client
+        self.key = key
         self.timeout = timeout
+        self.blocking = blocking
+        self.label = label
+        self.auto_renew = auto_renew
+        self.renew_ratio = renew_ratio
+        self.cancel_on_loss = cancel_on_loss
+        self.ownership_lost = asyncio.Event()
+        self._watchdog: asyncio.Task | None = None
         self.lock = Lock(
             redis=redis_client,
             name=key,
@@ -22,20 +164,180 @@ class RedisLock:
         )
 
     async def acquire(self) -> None:
-        acquired = await self.lock.acquire()
+        started_at = time.perf_counter()
+        acquired = await self._acquire()
+        LOCK_ACQUIRE_WAIT.labels(lock=self.label, result='acquired' if acquired else 'rejected').observe(
+            time.perf_counter() - started_at
+        )
 
         if not acquired:
             raise AlreadyAcquiredError('Lock is already acquired')
 
+        self.ownership_lost.clear()
+        if self.auto_renew:
+            self._watchdog = asyncio.create_task(self._watch(owner=asyncio.current_task()))
+
+    async def _acquire(self) -> bool:
+        return await self.lock.acquire()
+
     async def release(self) -> None:
+        await self._stop_watchdog()
+        if self.ownership_lost.is_set():
+            return
+
+        await self._release()
+
+    async def _release(self) -> None:
         await self.lock.release()
 
     async def extend(self) -> None:
         await self.lock.extend(self.timeout)
 
+    async def _renew(self) -> None:
+        await self.lock.reacquire()
+
+    async def _watch(self, owner: asyncio.Task | None) -> None:
+        renewed_at = time.monotonic()
+        while time.monotonic() - renewed_at < self.timeout:
+            await asyncio.sleep(self.timeout * self.renew_ratio)
+            try:
+                await self._renew()
+            except LockNotOwnedError:
+                break
+            except RedisError as e:
+                logger.warning({'message': 'REDIS_LOCK: Failed to renew', 'key': self.key, 'error': str(e)})
+                continue
+            renewed_at = time.monotonic()
+
+        logger.warning({'message': 'REDIS_LOCK: Ownership lost', 'key': self.key})
+        self.ownership_lost.set()
+        if self.cancel_on_loss and owner is not None:
+            owner.cancel()
+
+    async def _stop_watchdog(self) -> None:
+        if self._watchdog is None:
+            return
+
+        self._watchdog.cancel()
+        # `asyncio.wait` doesn't raise, so cancellation of the current task isn't swallowed
+        await asyncio.wait([self._watchdog])
+        self._watchdog = None
+
     async def __aenter__(self) -> Self:
         await self.acquire()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
         await self.release()
+
+
+class FairRedisLock(RedisLock):
+    """
+    Distributed lock with a FIFO queue of waiters, woken up on release instead of sleep polling.
+
+    Blocking waiters are queued in a sorted set and block on their own wake list with BLPOP.
+    Release hands the lock over to the first waiter in a round-trip. Every waiter keeps a short-lived
+    key refreshed while it waits, so crashed waiters are dropped from the queue, and re-checks the lock
+    every `waiter_ttl / 2` seconds to take over a lock expired with a crashed holder.
+    A non-blocking acquire doesn't jump the queue: it fails while there are waiters.
+
+    Compatible with `RedisLock` on the same key: both store the owner token in the lock key.
+
+    Args:
+        waiter_ttl: Time-to-live of the waiter key in seconds.
+
+    Example:
+        async with FairRedisLock(redis_client, 'some_key', timeout=30, blocking=True, label='some'):
+            await do_something()
+    """
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        key: str,
+        timeout: float = 10.0,
+        blocking: bool = False,
+        label: str = 'default',
+        auto_renew: bool = False,
+        renew_ratio: float = 1 / 3,
+        cancel_on_loss: bool = False,
+        waiter_ttl: float = 5.0,
+    ):
+        super().__init__(
+            redis_client,
+            key,
+            timeout=timeout,
+            blocking=blocking,
+            label=label,
+            auto_renew=auto_renew,
+            renew_ratio=renew_ratio,
+            cancel_on_loss=cancel_on_loss,
+        )
+        self.waiter_ttl = waiter_ttl
+        self.token = uuid4().hex
+        self._queue_keys = [key, f'{key}:queue']
+        self._waiter_key_prefix = f'{key}:waiter:'
+        self._wake_key_prefix = f'{key}:wake:'
+        self._acquire_script = redis_client.register_script(FAIR_ACQUIRE_SCRIPT)
+        self._release_script = redis_client.register_script(FAIR_RELEASE_SCRIPT)
+        self._leave_script = redis_client.register_script(FAIR_LEAVE_SCRIPT)
+        self._extend_script = redis_client.register_script(FAIR_EXTEND_SCRIPT)
+
+    async def _acquire(self) -> bool:
+        deadline = time.monotonic() + self.timeout
+        acquired = False
+        try:
+            while not (acquired := await self._try_acquire()):
+                remaining = deadline - time.monotonic()
+                if not self.blocking or remaining <= 0:
+                    break
+                # The asyncio client returns awaitables, but shares the sync client's command signatures
+                await cast(
+                    Awaitable[list | None],
+                    self.redis_client.blpop([self._wake_key_prefix + self.token], timeout=min(remaining, self.waiter_ttl / 2)),
+                )
+        finally:
+            if self.blocking and not acquired:
+                with suppress(RedisError):
+                    await self._leave_script(
+                        keys=self._queue_keys,
+                        args=[self.token, self._waiter_key_prefix, self._wake_key_prefix, self._waiter_ttl_ms],
+                    )
+
+        return acquired
+
+    async def _try_acquire(self) -> bool:
+        acquired = await self._acquire_script(
+            keys=[*self._queue_keys, f'{self.key}:queue_seq'],
+            args=[
+                self.token,
+                int(self.timeout * 1000),
+                self._waiter_key_prefix,
+                self._wake_key_prefix,
+                self._waiter_ttl_ms,
+                int(self.blocking),
+            ],
+        )
+        return bool(acquired)
+
+    async def _release(self) -> None:
+        released = await self._release_script(
+            keys=self._queue_keys, args=[self.token, self._waiter_key_prefix, self._wake_key_prefix, self._waiter_ttl_ms]
+        )
+        if not released:
+            raise LockNotOwnedError("Cannot release a lock that's no longer owned")
+
+    async def extend(self) -> None:
+        await self._extend(replace_ttl=False)
+
+    async def _renew(self) -> None:
+        await self._extend(replace_ttl=True)
+
+    async def _extend(self, replace_ttl: bool) -> None:
+        extended = await self._extend_script(keys=[self.key], args=[self.token, int(self.timeout * 1000), int(replace_ttl)])
+        if not extended:
+            raise LockNotOwnedError("Cannot extend a lock that's no longer owned")
+
+    @property
+    def _waiter_ttl_ms(self) -> int:
+        return int(self.waiter_ttl * 1000)
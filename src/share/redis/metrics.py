@@ -0,0 +1,81 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Literal
+
+from share.prometheus.metrics import LATENCY_BUCKETS, LazyMetric, observe_duration
+
+logger = getLogger(__name__)
+
+CacheTier = Literal['local', 'redis']
+
+CACHE_LOOKUPS = LazyMetric(
+    'Counter', 'cache_lookups_total', 'Cache lookups by tier and result', labelnames=('cache', 'tier', 'result')
+)
+CACHE_DESERIALIZATION_ERRORS = LazyMetric(
+    'Counter', 'cache_deserialization_errors_total', 'Cache entries failed to deserialize', labelnames=('cache',)
+)
+CACHE_SUPPRESSED_ERRORS = LazyMetric(
+    'Counter', 'cache_suppressed_errors_total', 'Redis errors suppressed by cache', labelnames=('cache', 'operation')
+)
+CACHE_OPERATION_DURATION = LazyMetric(
+    'Histogram',
+    'cache_operation_duration_seconds',
+    'Cache operation latency',
+    labelnames=('cache', 'operation'),
+    buckets=LATENCY_BUCKETS,
+)
+
+LOCK_ACQUIRE_WAIT = LazyMetric(
+    'Histogram',
+    'redis_lock_acquire_wait_seconds',
+    'Time spent acquiring Redis locks',
+    labelnames=('lock', 'result'),
+    buckets=LATENCY_BUCKETS,
+)
+
+
+@dataclass
+class CacheStats:
+    """In-process hit/miss counters of `GenericCache` for the local (L1) and Redis (L2) tiers."""
+
+    local_hits: int = 0
+    local_misses: int = 0
+    hits: int = 0
+    misses: int = 0
+
+
+class CacheMetrics:
+    """Reports metrics of a cache labeled by its key prefix and keeps in-process hit/miss counters."""
+
+    def __init__(self, cache: str):
+        self.cache = cache
+        self.stats = CacheStats()
+
+    def lookup(self, tier: CacheTier, hit: bool) -> None:
+        if tier == 'local':
+            if hit:
+                self.stats.local_hits += 1
+            else:
+                self.stats.local_misses += 1
+        elif hit:
+            self.stats.hits += 1
+        else:
+            self.stats.misses += 1
+
+        CACHE_LOOKUPS.labels(cache=self.cache, tier=tier, result='hit' if hit else 'miss').inc()
+
+    def deserialization_error(self) -> None:
+        CACHE_DESERIALIZATION_ERRORS.labels(cache=self.cache).inc()
+
+    def suppressed_error(self, operation: str, error: Exception) -> None:
+        CACHE_SUPPRESSED_ERRORS.labels(cache=self.cache, operation=operation).inc()
+        logger.warning(
+            {'message': 'CACHE: Redis error suppressed', 'cache': self.cache, 'operation': operation, 'error': str(error)}
+        )
+
+    @contextmanager
+    def observe(self, operation: str) -> Iterator[None]:
+        with observe_duration(CACHE_OPERATION_DURATION.labels(cache=self.cache, operation=operation)):
+            yield
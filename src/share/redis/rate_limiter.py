@@ -0,0 +1,102 @@
+import asyncio
+import time
+from typing import Self
+
+from redis.asyncio import Redis
+
+# Token bucket refilled by the time elapsed since the last call, time is taken from Redis to avoid clock skew.
+# KEYS: bucket key
+# ARGV: rate per second, capacity, requested tokens
+# Returns milliseconds to wait until the requested tokens are available, 0 if they are taken.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+
+local time = redis.call('time')
+local now = time[1] * 1000 + time[2] / 1000
+
+local bucket = redis.call('hmget', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate / 1000)
+
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+else
+    wait = math.ceil((requested - tokens) * 1000 / rate)
+end
+
+redis.call('hset', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('pexpire', KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return wait
+"""
+
+
+class RateLimitExceededError(Exception):
+    ...
+
+
+class RedisRateLimiter:
+    """
+    Distributed token bucket rate limiter.
+
+    The bucket holds up to `capacity` tokens and is refilled with `rate` tokens per second,
+    so short bursts up to `capacity` are allowed while the average rate is bounded by `rate`.
+    The bucket is updated atomically by a Lua script.
+
+    Args:
+        redis_client: Redis client.
+        key: Bucket key, share it between all callers of the limited resource.
+        rate: Tokens per second.
+        capacity: Max tokens in the bucket. Defaults to `rate`.
+        blocking: Wait for tokens instead of raising `RateLimitExceededError` right away.
+        timeout: Max time to wait for tokens in seconds.
+
+    Example:
+        limiter = RedisRateLimiter(redis_client, 'payments_api', rate=50, blocking=True)
+
+        async with limiter:
+            await payments_api.charge(...)
+
+        async with async_suppress(RateLimitExceededError), RedisRateLimiter(redis_client, 'sms', rate=1):
+            await send_sms(...)
+    """
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        key: str,
+        rate: float,
+        capacity: float | None = None,
+        blocking: bool = False,
+        timeout: float = 10.0,
+    ):
+        if rate <= 0:
+            raise ValueError('`rate` must be greater than 0')
+
+        self.key = key
+        self.rate = rate
+        self.capacity = rate if capacity is None else capacity
+        self.blocking = blocking
+        self.timeout = timeout
+        self._script = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def acquire(self, tokens: float = 1) -> None:
+        if tokens > self.capacity:
+            raise ValueError('`tokens` must not exceed the bucket capacity')
+
+        deadline = time.monotonic() + self.timeout
+        while wait_ms := await self._script(keys=[self.key], args=[self.rate, self.capacity, tokens]):
+            wait = wait_ms / 1000
+            if not self.blocking or time.monotonic() + wait > deadline:
+                raise RateLimitExceededError('Rate limit is exceeded')
+            await asyncio.sleep(wait)
+
+    async def __aenter__(self) -> Self:
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        ...
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from typing import Self
+from uuid import uuid4
+
+from redis.asyncio import Redis
+from redis.exceptions import LockNotOwnedError
+
+# Leases are stored in a sorted set scored by their expiration time taken from Redis.
+# KEYS: semaphore key
+# ARGV: token, limit, lease ttl ms
+ACQUIRE_SCRIPT = """
+local time = redis.call('time')
+local now = time[1] * 1000 + math.floor(time[2] / 1000)
+
+redis.call('zremrangebyscore', KEYS[1], '-inf', now)
+if redis.call('zcard', KEYS[1]) >= tonumber(ARGV[2]) then
+    return 0
+end
+
+redis.call('zadd', KEYS[1], now + ARGV[3], ARGV[1])
+if redis.call('pttl', KEYS[1]) < tonumber(ARGV[3]) then
+    redis.call('pexpire', KEYS[1], ARGV[3])
+end
+return 1
+"""
+
+# KEYS: semaphore key
+# ARGV: token, lease ttl ms
+EXTEND_SCRIPT = """
+local time = redis.call('time')
+local now = time[1] * 1000 + math.floor(time[2] / 1000)
+
+local expires_at = redis.call('zscore', KEYS[1], ARGV[1])
+if not expires_at or tonumber(expires_at) <= now then
+    return 0
+end
+
+redis.call('zadd', KEYS[1], now + ARGV[2], ARGV[1])
+if redis.call('pttl', KEYS[1]) < tonumber(ARGV[2]) then
+    redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 1
+"""
+
+
+class SemaphoreExhaustedError(Exception):
+    ...
+
+
+class RedisSemaphore:
+    """
+    Distributed counting semaphore with lease expiry.
+
+    Allows up to `limit` concurrent holders of the key. Every holder takes a lease that expires
+    after `timeout` seconds, so slots of crashed holders are freed. Call `extend` for longer work.
+    A blocking semaphore re-checks free slots every `retry_interval` seconds.
+
+    Args:
+        redis_client: Redis client.
+        key: Semaphore key.
+        limit: Max number of concurrent holders.
+        timeout: Lease time-to-live and max time to wait for a blocking semaphore in seconds.
+        blocking: Wait for a free slot instead of raising `SemaphoreExhaustedError` right away.
+        retry_interval: Interval between attempts of a blocking semaphore in seconds.
+
+    Example:
+        async with RedisSemaphore(redis_client, 'clickhouse_heavy_queries', limit=4, timeout=60, blocking=True):
+            await run_heavy_query()
+
+        async with async_suppress(SemaphoreExhaustedError), RedisSemaphore(redis_client, 'reports', limit=2):
+            await build_report()
+    """
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        key: str,
+        limit: int,
+        timeout: float = 10.0,
+        blocking: bool = False,
+        retry_interval: float = 0.1,
+    ):
+        if limit <= 0:
+            raise ValueError('`limit` must be greater than 0')
+
+        self.key = key
+        self.limit = limit
+        self.timeout = timeout
+        self.blocking = blocking
+        self.retry_interval = retry_interval
+        self.redis_client = redis_client
+        self.token: str | None = None
+        self._acquire_script = redis_client.register_script(ACQUIRE_SCRIPT)
+        self._extend_script = redis_client.register_script(EXTEND_SCRIPT)
+
+    async def acquire(self) -> None:
+        token = uuid4().hex
+        deadline = time.monotonic() + self.timeout
+        while not await self._acquire_script(keys=[self.key], args=[token, self.limit, self._timeout_ms]):
+            remaining = deadline - time.monotonic()
+            if not self.blocking or remaining <= 0:
+                raise SemaphoreExhaustedError('Semaphore has no free slots')
+            await asyncio.sleep(min(self.retry_interval, remaining))
+
+        self.token = token
+
+    async def release(self) -> None:
+        if self.token is None:
+            return
+
+        token, self.token = self.token, None
+        await self.redis_client.zrem(self.key, token)
+
+    async def extend(self) -> None:
+        if self.token is None or not await self._extend_script(keys=[self.key], args=[self.token, self._timeout_ms]):
+            raise LockNotOwnedError("Cannot extend a lease that's no longer owned")
+
+    @property
+    def _timeout_ms(self) -> int:
+        return int(self.timeout * 1000)
+
+    async def __aenter__(self) -> Self:
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.release()
@@ -0,0 +1,69 @@
+import asyncio
+
+from share.clickhouse.inserter import ClickhouseBufferedInserter, ClickhouseBufferFullError
+
+MAX_ROWS = 100
+MAX_BUFFERED_ROWS = 300
+FAILED_INSERTS = 3
+PRODUCERS_COUNT = 10
+ROWS_PER_INSERT = 50
+
+
+class FlakyClient:
+    """Fails the first inserts and records how many rows the inserter held at every insert."""
+
+    def __init__(self, inserter_getter):
+        self.inserter_getter = inserter_getter
+        self.failures_left = FAILED_INSERTS
+        self.inserted_rows: list = []
+        self.max_held_rows = 0
+
+    async def insert(self, table, rows, column_names, settings):  # noqa: ARG002
+        await asyncio.sleep(0.01)
+        inserter = self.inserter_getter()
+        self.max_held_rows = max(self.max_held_rows, len(inserter._rows) + len(rows))
+        if self.failures_left:
+            self.failures_left -= 1
+            raise ConnectionError('ClickHouse is unavailable')
+        self.inserted_rows.extend(rows)
+
+
+def test_buffer_stays_within_capacity_while_inserts_fail():
+    async def main():
+        inserter: ClickhouseBufferedInserter | None = None
+        client = FlakyClient(lambda: inserter)
+
+        async def get_client():
+            return client
+
+        inserter = ClickhouseBufferedInserter(
+            get_client,
+            'events',
+            column_names=('value',),
+            max_rows=MAX_ROWS,
+            max_delay=0.01,
+            max_buffered_rows=MAX_BUFFERED_ROWS,
+            put_timeout=0.05,
+        )
+        accepted_rows: list = []
+        max_buffered_rows = 0
+
+        async def produce(producer: int):
+            nonlocal max_buffered_rows
+            for batch in range(10):
+                rows = [(producer, batch, row) for row in range(ROWS_PER_INSERT)]
+                try:
+                    await inserter.insert(rows)
+                except ClickhouseBufferFullError:
+                    continue
+                accepted_rows.extend(rows)
+                max_buffered_rows = max(max_buffered_rows, len(inserter._rows))
+
+        await asyncio.gather(*(produce(producer) for producer in range(PRODUCERS_COUNT)))
+        await inserter.stop()
+
+        assert max_buffered_rows <= MAX_BUFFERED_ROWS
+        assert client.max_held_rows <= MAX_BUFFERED_ROWS
+        assert sorted(client.inserted_rows) == sorted(accepted_rows)
+
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+import asyncio
+from contextlib import aclosing
+from types import SimpleNamespace
+
+import pytest
+from aiokafka import TopicPartition
+
+from share.kafka.consumer import BaseKafkaConsumerRepository, RawRecord
+from share.kafka.consumer_maker import KafkaConsumerRepositoryMaker
+
+TOPIC = 'prefetch_topic'
+RECORDS_COUNT = 50
+BATCH_SIZE = 5
+
+
+class FakeConsumer:
+    def __init__(self):
+        self.positions: dict[TopicPartition, int] = {}
+        self.committed: dict[TopicPartition, int] = {}
+        self.stopped_at_position: int | None = None
+        self.stopped = False
+
+    async def start(self):
+        ...
+
+    async def stop(self):
+        self.stopped_at_position = self.positions.get(TopicPartition(TOPIC, 0), 0)
+        self.stopped = True
+
+    def assign(self, topic_partitions):
+        self.positions = dict.fromkeys(topic_partitions, 0)
+
+    async def position(self, topic_partition):
+        return self.positions[topic_partition]
+
+    def seek(self, topic_partition, offset):
+        assert not self.stopped, 'seek after stop'
+        self.positions[topic_partition] = offset
+
+    def pause(self, *topic_partitions):
+        ...
+
+    def resume(self, *topic_partitions):
+        ...
+
+    def highwater(self, topic_partition):  # noqa: ARG002
+        return RECORDS_COUNT
+
+    async def commit(self, offsets):
+        self.committed.update(offsets)
+
+    async def getmany(self, *topic_partitions, timeout_ms, max_records):  # noqa: ARG002
+        await asyncio.sleep(0)
+        topic_partition = topic_partitions[0]
+        start = self.positions[topic_partition]
+        end = min(start + max_records, RECORDS_COUNT)
+        self.positions[topic_partition] = end
+        records = [
+            SimpleNamespace(key=None, value=b'{}', partition=0, offset=offset, timestamp=0) for offset in range(start, end)
+        ]
+        return {topic_partition: records} if records else {}
+
+
+class PrefetchConsumerRepository(BaseKafkaConsumerRepository[RawRecord]):
+    bootstrap_servers = ['localhost:9092']
+    topic = TOPIC
+    group_id = 'prefetch_group'
+    batch_size = BATCH_SIZE
+    poll_timeout_ms = 0
+    prefetch_depth = 2
+
+    def _create_consumer(self) -> None:
+        self._consumer = FakeConsumer()
+        self._consumer.assign(self._topic_partitions)
+
+
+class FakeLock:
+    def __init__(self, key: str):
+        self.key = key
+
+    async def acquire(self):
+        ...
+
+    async def release(self):
+        ...
+
+    async def extend(self):
+        ...
+
+
+class HandlerError(Exception):
+    ...
+
+
+def _read_ahead_tasks() -> list[asyncio.Task]:
+    return [
+        task
+        for task in asyncio.all_tasks()
+        if getattr(task.get_coro(), '__qualname__', '').endswith('._read_ahead') and not task.done()
+    ]
+
+
+def test_handler_error_cancels_read_ahead_and_rewinds_before_stop():
+    async def main():
+        maker = KafkaConsumerRepositoryMaker(PrefetchConsumerRepository, 0, lock_class=FakeLock, lock_kwargs={})
+        with pytest.raises(HandlerError):
+            async with maker, aclosing(maker.get_batches()) as batches:
+                async for batch in batches:
+                    # The handler fails on the second batch
+                    if batch[0].offset == BATCH_SIZE:
+                        raise HandlerError
+
+        consumer = maker.consumer_repo._consumer
+        assert not _read_ahead_tasks()
+        # Rewound to the record after the last yielded batch before the consumer was stopped
+        assert consumer.stopped_at_position == 2 * BATCH_SIZE
+        # The batch the handler failed on is not committed
+        assert consumer.committed == {TopicPartition(TOPIC, 0): BATCH_SIZE}
+
+    asyncio.run(main())
+
+
+def test_stop_cancels_read_ahead_of_unclosed_iteration():
+    async def main():
+        consumer_repo = PrefetchConsumerRepository(partition=0)
+        batches = consumer_repo.get_batches()
+        async for _ in batches:
+            break
+
+        assert _read_ahead_tasks()
+        await consumer_repo.stop()
+
+        assert not _read_ahead_tasks()
+        assert consumer_repo._consumer.stopped_at_position == BATCH_SIZE
+        await batches.aclose()
+
+    asyncio.run(main())